@@ -0,0 +1,82 @@
+"""
+Asset pipeline - decoding and parsing on a thread pool, GL uploads time-sliced on the render thread
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config import TEX_DIR, MDL_DIR, ASSET_WORKERS, ASSET_UPLOAD_BUDGET_MS
+from mesh import load_obj_arrays
+from texture_cache import load_texture_data
+from textures import textures
+from utils import build_obj_model, replace_model, load_sfx
+
+class AssetLoader:
+    """
+    Queue assets with texture() / model() / sound(), then call pump() once per frame.
+    Work runs in parallel; finished jobs are applied in the order they were queued, so a
+    model is only built after the textures queued before it.
+    """
+    def __init__(self, workers=ASSET_WORKERS, upload_budget_ms=ASSET_UPLOAD_BUDGET_MS):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset")
+        self.upload_budget = upload_budget_ms / 1000.0
+        self.jobs = deque() # (label, future, finish on the GL thread or None)
+        self.total = 0
+        self.finished = 0
+        self.current = ""
+
+    def _submit(self, label, work, finish, *args):
+        self.jobs.append((label, self.pool.submit(work, *args), finish))
+        self.total += 1
+
+    def texture(self, name, filename):
+        # Registered right away (so it can load on demand); prefetched here
+        if not os.path.exists(os.path.join(TEX_DIR, filename)):
+            print(f"Warning: Texture {os.path.join(TEX_DIR, filename)} not found.")
+            return
+        textures.register(name, filename)
+        self._submit(name, load_texture_data, lambda data: textures.install(name, data), filename)
+
+    def model(self, key, filename, tex_key, material_textures=None):
+        path = os.path.join(MDL_DIR, filename)
+        if not os.path.exists(path): return
+        def finish(arrays):
+            replace_model(key, build_obj_model(arrays, tex_key, material_textures))
+        self._submit(key, load_obj_arrays, finish, path)
+
+    def sound(self, name, filename):
+        # pygame.mixer.Sound needs no GL context - loaded and registered on the worker
+        self._submit(name, load_sfx, None, name, filename)
+
+    @property
+    def progress(self):
+        return self.finished / self.total if self.total else 1.0
+
+    @property
+    def done(self):
+        return not self.jobs
+
+    def pump(self):
+        """Apply finished jobs until the upload budget is spent (at least one per call)"""
+        deadline = time.perf_counter() + self.upload_budget
+        applied = 0
+        while self.jobs and (applied == 0 or time.perf_counter() < deadline):
+            label, future, finish = self.jobs[0]
+            if not future.done(): break
+            self.jobs.popleft()
+            self.current = label
+            try:
+                result = future.result()
+                if finish is not None: finish(result)
+            except Exception as e:
+                print(f"Asset Error {label}: {e}")
+            self.finished += 1
+            applied += 1
+        if self.done: self.pool.shutdown(wait=False)
+        return self.done
+
+    def finish_all(self):
+        """Block until everything is loaded - for tools that don't run a frame loop"""
+        while not self.done:
+            if not self.jobs[0][1].done(): self.jobs[0][1].result()
+            self.pump()
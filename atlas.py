@@ -0,0 +1,138 @@
+"""
+UI texture atlas - sprites packed into one downscaled texture with a UV table per texture name
+
+Build step:  python atlas.py   (the loader also rebuilds when a source image changed)
+At runtime the atlas is one texture-manager entry; every sprite name is an alias of it.
+"""
+import os
+import json
+import numpy as np
+import pygame
+from OpenGL.GL import *
+from config import TEX_DIR, UI_ATLAS_NAME, UI_ATLAS_SPRITES
+from textures import textures
+from cache_key import source_key
+from glstate import bind_texture
+
+ATLAS_WIDTH = 1024
+ATLAS_PAD = 4       # Edge pixels repeated around each sprite so filtering can't bleed
+ATLAS_MAX_LEVEL = 2 # Mip levels stop before the padding is averaged away
+
+def atlas_paths(name=UI_ATLAS_NAME):
+    base = os.path.join(TEX_DIR, name)
+    return base + '.png', base + '.json'
+
+def _load_sprite(path, max_size):
+    surf = pygame.image.load(path)
+    w, h = surf.get_size()
+    f = min(1.0, max_size / float(max(w, h)))
+    if f < 1.0:
+        surf = pygame.transform.smoothscale(surf, (max(1, int(w * f)), max(1, int(h * f))))
+    w, h = surf.get_size()
+    return np.frombuffer(pygame.image.tostring(surf, "RGBA", False), dtype=np.uint8).reshape(h, w, 4)
+
+def pack_shelves(sizes, width=ATLAS_WIDTH, pad=ATLAS_PAD):
+    """Shelf packing, tallest first. sizes: {name: (w, h)} -> ({name: (x, y)}, width, height)"""
+    width = max([width] + [w + 2 * pad for w, h in sizes.values()])
+    placed = {}
+    x = y = shelf_h = 0
+    for name in sorted(sizes, key=lambda n: -sizes[n][1]):
+        w, h = sizes[name][0] + 2 * pad, sizes[name][1] + 2 * pad
+        if x + w > width:
+            x, y, shelf_h = 0, y + shelf_h, 0
+        placed[name] = (x + pad, y + pad)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return placed, width, y + shelf_h
+
+def build_atlas(sprites=UI_ATLAS_SPRITES, name=UI_ATLAS_NAME):
+    """Pack the sprites into <name>.png and write the pixel rects to <name>.json"""
+    images, sources = {}, {}
+    for key, (filename, max_size) in sprites.items():
+        path = os.path.join(TEX_DIR, filename)
+        if not os.path.exists(path):
+            print(f"Atlas: {path} not found, skipped")
+            continue
+        images[key] = _load_sprite(path, max_size)
+        sources[key] = source_key(path, file=filename, max_size=max_size)
+
+    placed, width, height = pack_shelves({k: (img.shape[1], img.shape[0]) for k, img in images.items()})
+    pixels = np.zeros((height, width, 4), dtype=np.uint8)
+    rects = {}
+    p = ATLAS_PAD
+    for key, img in images.items():
+        x, y = placed[key]
+        h, w = img.shape[:2]
+        pixels[y - p:y + h + p, x - p:x + w + p] = np.pad(img, ((p, p), (p, p), (0, 0)), mode='edge')
+        rects[key] = (x, y, w, h)
+
+    png_path, json_path = atlas_paths(name)
+    surf = pygame.image.frombuffer(pixels.tobytes(), (width, height), "RGBA")
+    pygame.image.save(surf, png_path)
+    with open(json_path, 'w') as f:
+        json.dump({'size': (width, height), 'rects': rects, 'sources': sources}, f, indent=1)
+    print(f"Atlas: {len(rects)} sprites -> {png_path} ({width}x{height})")
+    return png_path, json_path
+
+def _atlas_current(json_path, sprites):
+    try:
+        with open(json_path) as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    for key, (filename, max_size) in sprites.items():
+        path = os.path.join(TEX_DIR, filename)
+        if not os.path.exists(path): continue
+        src = info['sources'].get(key)
+        if src is None or source_key(path, file=filename, max_size=max_size) != src:
+            return None
+    return info
+
+def upload_atlas(png_path, tid=None):
+    """(tid, bytes on the GPU) for the atlas image, re-specifying `tid` if given"""
+    surf = pygame.image.load(png_path)
+    width, height = surf.get_size()
+    data = pygame.image.tostring(surf, "RGBA", False)
+    if not tid: tid = glGenTextures(1)
+    bind_texture(tid)
+    glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, ATLAS_MAX_LEVEL)
+    glGenerateMipmap(GL_TEXTURE_2D)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+    return tid, len(data) * 21 // 16 # Base level plus two mips
+
+def register_ui_atlas(sprites=UI_ATLAS_SPRITES, name=UI_ATLAS_NAME):
+    """
+    Register the atlas with the texture manager, every sprite as an alias of it.
+    Nothing loads until a sprite is first drawn; if the atlas can't be built or
+    uploaded, the sprites are registered as separate textures instead.
+    """
+    png_path, json_path = atlas_paths(name)
+
+    def load(tid=None, data=None):
+        try:
+            info = _atlas_current(json_path, sprites)
+            if info is None or not os.path.exists(png_path):
+                build_atlas(sprites, name)
+                info = _atlas_current(json_path, sprites)
+            tid, nbytes = upload_atlas(png_path, tid)
+            width, height = info['size']
+            for key, (x, y, w, h) in info['rects'].items():
+                textures.alias(key, name, (x / width, y / height, (x + w) / width, (y + h) / height))
+            print(f"Loaded UI atlas: {len(info['rects'])} sprites")
+            return tid, nbytes
+        except Exception:
+            print("UI atlas unavailable, loading sprites separately")
+            for key, (filename, _) in sprites.items():
+                textures.register(key, filename)
+            raise
+
+    for key in sprites:
+        textures.alias(key, name)
+    textures.register_loader(name, load, [os.path.join(TEX_DIR, f) for f, _ in sprites.values()])
+
+if __name__ == "__main__":
+    build_atlas()
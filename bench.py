@@ -0,0 +1,242 @@
+"""
+Benchmark harness - world generation, entity ticks, terrain sampling and OBJ parsing, headless and seeded
+
+    python bench.py                          # scales 1, 10, 100 -> bench_results.json
+    python bench.py --ticks 500 --out a.json
+    python bench.py --gl                     # also time draw_scene over a camera path (hidden window)
+    python bench.py --compare a.json         # ops/sec against an earlier run
+"""
+import os
+import sys
+import gc
+import json
+import math
+import time
+import platform
+import argparse
+import subprocess
+import tracemalloc
+import numpy as np
+import pygame
+from config import MDL_DIR
+
+DEFAULT_SCALES = (1, 10, 100)
+DEFAULT_TICKS = 200
+HEIGHT_SAMPLES = 200000
+TICK_DF = 1.0 # One 60 Hz frame
+
+def _rss_kb():
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss // 1024 if sys.platform == 'darwin' else rss
+    except ImportError:
+        return None
+
+def measure(name, fn, ops, repeat=3, **info):
+    """Best of `repeat` runs of fn(); `ops` is the work one run does (for ops/sec)"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    # One more run under tracemalloc for the allocation peak (not timed - tracing is slow)
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = min(times)
+    result = dict(name=name, ops=ops, seconds=best, ops_per_sec=ops / best if best else float('inf'),
+                  mean_seconds=sum(times) / len(times), peak_alloc_kb=peak // 1024, max_rss_kb=_rss_kb(), **info)
+    print(f"  {name:<28}{result['ops_per_sec']:>14,.0f} ops/s  {best * 1000:9.2f} ms  peak {result['peak_alloc_kb']:,} KB")
+    return result
+
+# --- CPU benchmarks ---
+
+def bench_worldgen(scale, seed):
+    from worldgen import generate_world
+    count = len(generate_world(scale, seed))
+    return measure('generate_world', lambda: generate_world(scale, seed), 1, scale=scale, entities=count)
+
+def bench_entity_ticks(scale, seed, ticks, repeat=3):
+    from worldgen import generate_world
+    from entities import Player, Wolf, Spider
+    results = []
+    for cls, registry in ((Player, None), (Wolf, 'wolves'), (Spider, 'spiders')):
+        times = []
+        for _ in range(repeat):
+            # Fresh world every run so mobs start from the same state; only the ticks are timed
+            world = generate_world(scale, seed)
+            ents = [Player()] if cls is Player else getattr(world, registry)
+            # Mobs tick as a whole store, the way the game runs them (ops stay per mob update)
+            tick = ents[0].update if cls is Player else cls.store.update
+            start = time.perf_counter()
+            for _ in range(ticks):
+                tick(TICK_DF)
+            times.append(time.perf_counter() - start)
+        best = min(times)
+        ops = len(ents) * ticks
+        name = f'{cls.__name__}.update'
+        result = dict(name=name, ops=ops, seconds=best, ops_per_sec=ops / best if best else float('inf'),
+                      mean_seconds=sum(times) / len(times), max_rss_kb=_rss_kb(),
+                      scale=scale, ticks=ticks, entities=len(ents))
+        print(f"  {name:<28}{result['ops_per_sec']:>14,.0f} ops/s  {best * 1000:9.2f} ms  ({len(ents)} x {ticks} ticks)")
+        results.append(result)
+    return results
+
+def bench_heights(seed, samples=HEIGHT_SAMPLES):
+    from terrain import get_height, get_heights
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(-100, 100, samples)
+    zs = rng.uniform(-100, 100, samples)
+    xl, zl = xs.tolist(), zs.tolist()
+    def scalar():
+        for x, z in zip(xl, zl): get_height(x, z)
+    return [measure('get_height', scalar, samples),
+            measure('get_heights (vectorized)', lambda: get_heights(xs, zs), samples)]
+
+def bench_obj(filename='fir.obj'):
+    from mesh import parse_obj, load_obj_arrays
+    path = os.path.join(MDL_DIR, filename)
+    if not os.path.exists(path):
+        print(f"  {path} not found, OBJ benchmark skipped")
+        return []
+    load_obj_arrays(path) # Make sure the cache exists
+    return [measure('parse_obj', lambda: parse_obj(path), 1, file=filename),
+            measure('load_obj_arrays (cached)', lambda: load_obj_arrays(path), 1, file=filename)]
+
+# --- Offscreen GL ---
+
+def camera_path(frames, radius=35.0):
+    """A circle around spawn looking inwards, then a straight walk out across the map"""
+    path = []
+    half = frames // 2
+    for i in range(half):
+        a = 2 * math.pi * i / half
+        yaw = math.degrees(math.atan2(-math.sin(a), math.cos(a))) - 90
+        path.append(((math.sin(a) * radius, math.cos(a) * radius), (yaw, 10.0)))
+    for i in range(frames - half):
+        t = i / max(1, frames - half - 1)
+        path.append(((0.0, 40.0 - 80.0 * t), (0.0, 5.0)))
+    return path
+
+def bench_gl(scale, seed, frames):
+    import config
+    config.WINDOW_HIDDEN = True
+    import main as game # Creates the (hidden) window and GL context
+    from OpenGL.GL import glClear, glFinish, glLightfv, GL_COLOR_BUFFER_BIT, GL_DEPTH_BUFFER_BIT, \
+        GL_DEPTH_TEST, GL_LIGHTING, GL_FOG, GL_LIGHT0, GL_POSITION
+    from glstate import gl_state, enable
+    from world import ground_chunks
+    from profiler import profiler
+
+    game.asset_loader.finish_all()
+    game.generate_world(scale, seed)
+    path = camera_path(frames)
+
+    def frame(pos, rot):
+        game.player.pos = [pos[0], game.get_height(*pos) + 2.0, pos[1]]
+        game.player.cam_h = game.player.pos[1]
+        game.player.rot = list(rot)
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        enable(GL_DEPTH_TEST); enable(GL_LIGHTING); enable(GL_FOG)
+        game.setup_camera()
+        glLightfv(GL_LIGHT0, GL_POSITION, [50, 100, 50, 0])
+        game.update_ground(pos[0], pos[1])
+        game.draw_scene(False)
+        glFinish()
+        pygame.event.pump()
+
+    # Warm-up pass: streams the terrain chunks in and bakes the impostor
+    for pos, rot in path: frame(pos, rot)
+    while ground_chunks.pending:
+        frame(*path[-1]); time.sleep(0.001)
+
+    profiler.reset()
+    gl_state.flush_counts() # Warm-up calls don't count
+    profiler.set_enabled(True)
+    times = []
+    for pos, rot in path:
+        start = time.perf_counter()
+        frame(pos, rot)
+        times.append(time.perf_counter() - start)
+        gl_state.flush_counts()
+        profiler.end_frame()
+    profiler.set_enabled(False)
+
+    counters = {name: float(np.mean(v)) for name, v in profiler.counts.items()}
+    total = sum(times)
+    ms = np.array(times) * 1000.0
+    result = dict(name='draw_scene', ops=frames, seconds=total, ops_per_sec=frames / total,
+                  frame_ms_mean=float(ms.mean()), frame_ms_p95=float(np.percentile(ms, 95)),
+                  frame_ms_max=float(ms.max()), per_frame=counters, max_rss_kb=_rss_kb(), scale=scale)
+    print(f"  {'draw_scene':<28}{result['ops_per_sec']:>14,.1f} fps    {result['frame_ms_mean']:9.2f} ms  "
+          f"p95 {result['frame_ms_p95']:.2f} ms  {counters.get('draw_calls', 0):.0f} draws/frame  "
+          f"{counters.get('gl_state_issued', 0):.0f} state calls ({counters.get('gl_state_skipped', 0):.0f} skipped)")
+    return result
+
+# --- Runner ---
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run(scales, ticks, seed, gl=False, gl_frames=240):
+    results = []
+    for scale in scales:
+        print(f"scale x{scale}")
+        results.append(bench_worldgen(scale, seed))
+        results += bench_entity_ticks(scale, seed, ticks)
+    print("terrain / assets")
+    results += bench_heights(seed)
+    results += bench_obj()
+    if gl:
+        print("offscreen GL")
+        # The GL context lives as long as the process, so only the largest world is drawn
+        results.append(bench_gl(max(scales), seed, gl_frames))
+    return {
+        'meta': dict(commit=_commit(), time=time.strftime('%Y-%m-%dT%H:%M:%S'), seed=seed, ticks=ticks,
+                     python=platform.python_version(), numpy=np.__version__, platform=platform.platform()),
+        'results': results,
+    }
+
+def _key(r):
+    return (r['name'], r.get('scale'))
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {_key(r): r for r in json.load(f)['results']}
+    print(f"\nvs {baseline_path}")
+    for r in current['results']:
+        old = baseline.get(_key(r))
+        if old is None: continue
+        ratio = r['ops_per_sec'] / old['ops_per_sec'] if old['ops_per_sec'] else float('inf')
+        label = f"{r['name']}" + (f" x{r['scale']}" if r.get('scale') else "")
+        print(f"  {label:<34}{ratio:8.2f}x  {'faster' if ratio >= 1 else 'SLOWER'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES), help="entity count multipliers")
+    parser.add_argument('--ticks', type=int, default=DEFAULT_TICKS, help="update ticks per entity benchmark")
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--gl', action='store_true', help="also time draw_scene in a hidden window")
+    parser.add_argument('--gl-frames', type=int, default=240)
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', metavar='JSON', help="earlier results to compare against")
+    args = parser.parse_args()
+
+    pygame.init() # Entity constructors read pygame's clock
+    report = run(args.scales, args.ticks, args.seed, args.gl, args.gl_frames)
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=1)
+    print(f"Results written to {args.out}")
+    if args.compare: compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
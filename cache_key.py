@@ -0,0 +1,9 @@
+"""
+Source keys for the on-disk caches (meshes, textures, UI atlas) - a cache entry is valid while its key matches
+"""
+import os
+
+def source_key(path, **extra):
+    """mtime and size of path, plus any settings the cached result depends on"""
+    st = os.stat(path)
+    return dict(extra, mtime_ns=st.st_mtime_ns, size=st.st_size)
@@ -0,0 +1,148 @@
+"""
+Streamed terrain - fixed-size chunks meshed on a worker thread, uploaded on the GL thread
+"""
+import math
+import time
+import queue
+import threading
+from collections import OrderedDict
+import numpy as np
+from config import CHUNK_SIZE, CHUNK_STEP, CHUNK_VIEW_RADIUS, CHUNK_MAX_LOADED, CHUNK_UPLOAD_BUDGET_MS
+from terrain import get_heights
+from mesh import GpuMesh
+
+TEX_SCALE = 5.0 # World units per grass texture repeat
+
+def chunk_coord(x, z, size=CHUNK_SIZE):
+    return (int(math.floor(x / size)), int(math.floor(z / size)))
+
+def build_chunk_arrays(cx, cz, size=CHUNK_SIZE, step=CHUNK_STEP):
+    """Heights, normals and texcoords for one chunk as an interleaved vertex array + indices"""
+    n = int(round(size / step)) + 1
+    x0, z0 = cx * size, cz * size
+
+    # One extra ring of samples so normals match across chunk borders
+    axis = np.arange(-1, n + 1) * step
+    gx, gz = np.meshgrid(x0 + axis, z0 + axis, indexing='ij')
+    h = get_heights(gx, gz)
+
+    # Central differences
+    dhdx = (h[2:, 1:-1] - h[:-2, 1:-1]) / (2 * step)
+    dhdz = (h[1:-1, 2:] - h[1:-1, :-2]) / (2 * step)
+    normals = np.stack([-dhdx, np.ones_like(dhdx), -dhdz], axis=-1)
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+
+    xs, zs = gx[1:-1, 1:-1], gz[1:-1, 1:-1]
+    # Keep texcoords small: offset by whole repeats so far chunks don't lose float precision
+    u = (xs - math.floor(x0 / TEX_SCALE) * TEX_SCALE) / TEX_SCALE
+    v = (zs - math.floor(z0 / TEX_SCALE) * TEX_SCALE) / TEX_SCALE
+
+    verts = np.empty((n, n, 8), dtype=np.float32)
+    verts[..., 0] = xs; verts[..., 1] = h[1:-1, 1:-1]; verts[..., 2] = zs
+    verts[..., 3:6] = normals
+    verts[..., 6] = u; verts[..., 7] = v
+
+    # Two triangles per cell, same winding as the old GL_QUADS (counter-clockwise from above)
+    idx = np.arange(n * n, dtype=np.uint32).reshape(n, n)
+    a = idx[:-1, :-1]; b = idx[:-1, 1:]; c = idx[1:, 1:]; d = idx[1:, :-1]
+    indices = np.stack([a, b, c, a, c, d], axis=-1)
+    return verts.reshape(-1, 8), indices.ravel()
+
+class ChunkManager:
+    """Keeps the chunks around the player loaded, within a per-frame upload budget"""
+    def __init__(self, size=CHUNK_SIZE, step=CHUNK_STEP, view_radius=CHUNK_VIEW_RADIUS,
+                 max_loaded=CHUNK_MAX_LOADED, upload_budget_ms=CHUNK_UPLOAD_BUDGET_MS):
+        self.size = size
+        self.step = step
+        self.view_radius = view_radius
+        self.max_loaded = max(max_loaded, self._chunks_in_view())
+        self.upload_budget = upload_budget_ms / 1000.0
+
+        self.loaded = OrderedDict()  # (cx, cz) -> GpuMesh, least recently used first
+        self.pending = set()
+        self.wanted = set()
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = None
+
+    def _chunks_in_view(self):
+        r = int(math.ceil(self.view_radius / self.size)) + 1
+        return (2 * r + 1) ** 2
+
+    def _start_worker(self):
+        self._worker = threading.Thread(target=self._work, name="chunk-mesher", daemon=True)
+        self._worker.start()
+
+    def _work(self):
+        while True:
+            key = self._requests.get()
+            if key is None: return
+            # Skip requests the player has already walked away from
+            if key not in self.wanted:
+                self._results.put((key, None))
+                continue
+            verts, indices = build_chunk_arrays(key[0], key[1], self.size, self.step)
+            self._results.put((key, GpuMesh(verts, indices)))
+
+    def update(self, x, z):
+        """Call once per frame on the GL thread with the player position"""
+        if self._worker is None: self._start_worker()
+
+        # Wanted set: every chunk whose square touches the view circle, nearest first
+        pcx, pcz = chunk_coord(x, z, self.size)
+        r = int(math.ceil(self.view_radius / self.size))
+        wanted = []
+        for cx in range(pcx - r, pcx + r + 1):
+            for cz in range(pcz - r, pcz + r + 1):
+                # Distance from player to nearest point of the chunk square
+                nx = min(max(x, cx * self.size), (cx + 1) * self.size)
+                nz = min(max(z, cz * self.size), (cz + 1) * self.size)
+                d2 = (nx - x)**2 + (nz - z)**2
+                if d2 <= self.view_radius**2:
+                    wanted.append((d2, (cx, cz)))
+        wanted.sort()
+        self.wanted = set(key for _, key in wanted)
+
+        for _, key in wanted:
+            if key in self.loaded:
+                self.loaded.move_to_end(key)
+            elif key not in self.pending:
+                self.pending.add(key)
+                self._requests.put(key)
+
+        self._upload_ready()
+        self._evict()
+
+    def _upload_ready(self):
+        deadline = time.perf_counter() + self.upload_budget
+        uploaded = 0
+        # Always upload at least one chunk so streaming can't stall on a slow frame
+        while uploaded == 0 or time.perf_counter() < deadline:
+            try:
+                key, chunk = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(key)
+            if chunk is None or key not in self.wanted or key in self.loaded: continue
+            chunk.upload()
+            self.loaded[key] = chunk
+            uploaded += 1
+
+    def _evict(self):
+        while len(self.loaded) > self.max_loaded:
+            key = next(iter(self.loaded))
+            if key in self.wanted: break
+            self.loaded.pop(key).delete()
+
+    def draw(self, frustum=None):
+        chunks = list(self.loaded.values())
+        if frustum is not None and chunks:
+            visible = frustum.cull_boxes([c.lo for c in chunks], [c.hi for c in chunks], 'chunks')
+            chunks = [c for c, v in zip(chunks, visible) if v]
+        for chunk in chunks:
+            chunk.draw()
+
+    def clear(self):
+        for chunk in self.loaded.values():
+            chunk.delete()
+        self.loaded.clear()
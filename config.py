@@ -3,12 +3,56 @@ import os
 # DIMENSIONS
 WIDTH, HEIGHT = 1200, 800
 FOV = 70
+WINDOW_HIDDEN = False    # Offscreen rendering (bench.py --gl)
 
 # SETTINGS
 MOUSE_SENS = 0.2
 SPEED = 0.15
 FOOTSTEP_COOLDOWN = 350
 SHADOW_RES = 1024
+FOG_START = 50.0
+FOG_END = 150.0
+DRAW_DISTANCE = FOG_END  # Nothing past the fog end is visible
+UPDATE_RADIUS = 150.0    # Entities further than this from the player don't update
+SPATIAL_CELL_SIZE = 16   # Spatial hash cell side, world units
+TEXT_CACHE_SIZE = 256    # Laid-out UI strings kept between frames
+
+# TIMING
+SIM_TICK_RATE = 60            # Simulation ticks per second, independent of the frame rate
+SIM_MAX_TICKS_PER_FRAME = 8   # Past this a slow frame drops time instead of spiralling
+FPS_LIMIT = 0                 # Frame cap for clock.tick, 0 = uncapped
+VSYNC = False                 # Ask the driver to sync buffer swaps to the display
+
+# LEVEL OF DETAIL
+LOD_MOB_DISTANCES = (25.0, 60.0)   # Mobs: full detail, reduced tessellation, then a body+head proxy
+LOD_TREE_IMPOSTOR_DISTANCE = 70.0  # Trees beyond this are drawn as billboards
+LOD_HYSTERESIS = 4.0               # Distance past a threshold before the level switches
+
+# TERRAIN
+TERRAIN_EXTENT = 128   # Precomputed height grid covers -EXTENT..EXTENT
+TERRAIN_RES = 0.5      # Grid spacing in world units
+CHUNK_SIZE = 32               # World units per terrain chunk side
+CHUNK_STEP = 2.0              # Vertex spacing inside a chunk
+CHUNK_VIEW_RADIUS = 160       # Load chunks within this distance (fog ends at 150)
+CHUNK_MAX_LOADED = 160        # LRU cap on resident chunks
+CHUNK_UPLOAD_BUDGET_MS = 2.0  # GL upload time allowed per frame
+STATIC_REGION_SIZE = 32       # Static props are baked into one buffer per region and material
+TREE_SORT_DISTANCE = 1.0      # Camera travel before the tree draw order is revisited
+
+# TEXTURES
+TEXTURE_QUALITY = 0         # Mip levels dropped at load: 0 full size, 1 half, 2 quarter
+TEXTURE_COMPRESSION = True  # Let the driver S3TC-compress textures (cached compressed)
+TEXTURE_VRAM_BUDGET_MB = 256  # Unused textures are evicted (least recently used first) past this
+TEXTURE_RELOAD_INTERVAL = 1.0 # Seconds between checks for changed texture files, 0 disables
+
+# ASSET LOADING
+ASSET_WORKERS = 4             # Threads decoding images, parsing meshes and loading sounds
+ASSET_UPLOAD_BUDGET_MS = 4.0  # GL upload time allowed per frame while loading
+
+# PROFILER (F3 toggles the overlay, F4 writes CSV + Chrome trace to PROFILE_DIR)
+PROFILER_ENABLED = False      # Collect from startup; otherwise only while the overlay is shown
+PROFILER_WINDOW = 120         # Frames in the rolling stats
+PROFILER_MAX_EVENTS = 200000  # Section events kept for the trace export
 
 # PATHS
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +60,16 @@ ASSETS_DIR = os.path.join(BASE_DIR, "assets")
 TEX_DIR = os.path.join(ASSETS_DIR, "textures")
 MDL_DIR = os.path.join(ASSETS_DIR, "models")
 SFX_DIR = os.path.join(ASSETS_DIR, "sfx")
+PROFILE_DIR = os.path.join(BASE_DIR, "profiles")
+
+# UI ATLAS - texture name: (source file, max side in pixels after downscaling)
+UI_ATLAS_NAME = "ui_atlas"
+UI_ATLAS_SPRITES = {
+    'ui_inventory_bg': ('ui_inventory_bg.png', 1024),
+    'ui_inventory_slot': ('ui_inventory_slot.png', 128),
+    'icon_sword': ('icon_sword.png', 128),
+    'icon_bread': ('icon_bread.png', 128),
+}
 
 # COLORS
 C_SKY = (0.05, 0.05, 0.15, 1.0) # Night Sky
@@ -0,0 +1,43 @@
+"""
+Back-to-front ordering for a fixed set of points, kept between frames and only re-sorted after the eye moves
+"""
+import numpy as np
+from config import TREE_SORT_DISTANCE
+from profiler import profiler
+
+class DepthOrder:
+    """
+    order(eye) returns every point's index, furthest first. The order is only revisited
+    once the eye has moved more than `resort_distance` since the last sort; in between,
+    callers filter the kept order (visible) instead of sorting. Points at nearly equal
+    distance swap places constantly as the eye moves, so the "nearly sorted" order still
+    has inversions all along it - a plain argsort beats run-merging or insertion repair.
+    """
+    def __init__(self, resort_distance=TREE_SORT_DISTANCE):
+        self.resort_distance = resort_distance
+        self.points = np.zeros((0, 2))
+        self.order_idx = np.zeros(0, dtype=np.intp)
+        self._eye = None
+
+    def reset(self, points):
+        """New point set - rows starting x, y, z (only x and z are used)"""
+        self.points = np.asarray(points, dtype=np.float64)[:, [0, 2]]
+        self.order_idx = np.arange(len(self.points))
+        self._eye = None
+
+    def order(self, eye):
+        ex, ez = eye[0], eye[2]
+        if self._eye is not None:
+            mx, mz = ex - self._eye[0], ez - self._eye[1]
+            if mx*mx + mz*mz < self.resort_distance**2: return self.order_idx
+        p = self.points[self.order_idx]
+        d2 = (p[:, 0] - ex)**2 + (p[:, 1] - ez)**2
+        self.order_idx = self.order_idx[np.argsort(-d2)]
+        self._eye = (ex, ez)
+        profiler.count('depth_sorts')
+        return self.order_idx
+
+    def visible(self, eye, mask):
+        """Indices of the points where mask is set, back to front - a filter, no sort"""
+        idx = self.order(eye)
+        return idx[mask[idx]]
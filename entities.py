@@ -6,7 +6,19 @@ from OpenGL.GLU import *
 from config import WIDTH, HEIGHT
 from world import get_height
 from inventory import Inventory, Item
-from utils import texture_ids, display_lists, sfx_sounds
+from utils import display_lists, sfx_sounds
+from textures import textures
+from primitives import draw_sphere, primitive_mesh
+from static_batch import translate, scale, rotate_x, rotate_y
+from profiler import profiler
+from mobs import Column, wolves, spiders
+from glstate import enable, disable, bind_texture
+from render_queue import material
+
+# Render queue materials for the per-object entities (props are baked, trees instanced)
+CHEST_MATERIAL = material('chest', textured=True, color=None, cull=False, alpha_ref=0.4) # The model binds its textures
+FUR_MATERIAL = material('fur', texture='fur')
+SPIDER_MATERIAL = material('spider', color=(0.1, 0.1, 0.1))
 
 class Player:
     def __init__(self):
@@ -43,15 +55,15 @@ class Player:
         # Always draw weapon in hand if equipped (idle or attacking)
         if weapon and weapon.type == 'weapon':
             glLoadIdentity()
-            glDisable(GL_DEPTH_TEST); glDisable(GL_LIGHTING); glDisable(GL_TEXTURE_2D)
+            disable(GL_DEPTH_TEST); disable(GL_LIGHTING); disable(GL_TEXTURE_2D)
             
             # Use 3D projection for weapon in hand
             glMatrixMode(GL_PROJECTION); glPushMatrix(); glLoadIdentity()
             gluPerspective(60, WIDTH/HEIGHT, 0.1, 100)
             glMatrixMode(GL_MODELVIEW); glPushMatrix(); glLoadIdentity()
             
-            glEnable(GL_LIGHTING); glEnable(GL_LIGHT0)
-            glEnable(GL_TEXTURE_2D); glBindTexture(GL_TEXTURE_2D, texture_ids.get('sword_metal', 0))
+            enable(GL_LIGHTING); enable(GL_LIGHT0)
+            enable(GL_TEXTURE_2D); bind_texture(textures.id('sword_metal'))
             
             # Swing animation or idle bob
             if self.attacking:
@@ -67,25 +79,27 @@ class Player:
                 glRotatef(10, 0, 1, 0)
             
             # Draw Sword Model (Procedural)
-            quad = gluNewQuadric(); gluQuadricTexture(quad, GL_TRUE)
             glColor3f(0.8, 0.8, 0.9) # Metallic
             
             # Blade
-            glPushMatrix(); glScalef(0.06, 0.7, 0.015); gluSphere(quad, 1, 10, 10); glPopMatrix()
+            glPushMatrix(); glScalef(0.06, 0.7, 0.015); draw_sphere(1, 10, 10); glPopMatrix()
             # Guard
             glColor3f(0.4, 0.3, 0.2) # Bronze
-            glPushMatrix(); glTranslatef(0, -0.5, 0); glScalef(0.25, 0.04, 0.04); gluSphere(quad, 1, 8, 8); glPopMatrix()
+            glPushMatrix(); glTranslatef(0, -0.5, 0); glScalef(0.25, 0.04, 0.04); draw_sphere(1, 8, 8); glPopMatrix()
             # Handle
             glColor3f(0.3, 0.2, 0.1) # Wood
-            glPushMatrix(); glTranslatef(0, -0.7, 0); glScalef(0.04, 0.18, 0.04); gluSphere(quad, 1, 8, 8); glPopMatrix()
+            glPushMatrix(); glTranslatef(0, -0.7, 0); glScalef(0.04, 0.18, 0.04); draw_sphere(1, 8, 8); glPopMatrix()
             # Pommel
             glColor3f(0.5, 0.4, 0.3)
-            glPushMatrix(); glTranslatef(0, -0.85, 0); glScalef(0.06, 0.06, 0.06); gluSphere(quad, 1, 6, 6); glPopMatrix()
+            glPushMatrix(); glTranslatef(0, -0.85, 0); glScalef(0.06, 0.06, 0.06); draw_sphere(1, 6, 6); glPopMatrix()
 
             glMatrixMode(GL_PROJECTION); glPopMatrix(); glMatrixMode(GL_MODELVIEW); glPopMatrix()
-            glEnable(GL_DEPTH_TEST)
+            enable(GL_DEPTH_TEST)
 
 class Chest:
+    __slots__ = ('x', 'y', 'z', 'is_open', 'lid_angle', 'items')
+    BOUNDS = (0.2, 1.4) # Culling sphere: center height above y, radius
+    
     def __init__(self, x, z, loot=None):
         self.x, self.z = x, z
         self.y = get_height(x, z)
@@ -98,60 +112,54 @@ class Chest:
         # or we just rely on state.
         pass
         
-    def draw(self, shadow_pass=False):
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        
+    def submit(self, queue, shadow_pass=False):
         lid = display_lists.get('chest')
         if lid:
-            if shadow_pass:
-                glColor4f(0, 0, 0, 0.4)
-                glDisable(GL_TEXTURE_2D)
-                glDisable(GL_LIGHTING)
-            else:
-                # Material and texture is baked into display list
-                glEnable(GL_TEXTURE_2D)
-                
-            glDisable(GL_CULL_FACE)
-            glScalef(0.6, 0.6, 0.6)  # Slightly bigger
-            glCallList(lid)
-            glEnable(GL_CULL_FACE)
-        
-        glPopMatrix()
+            # Material and texture come from the model; 0.6 is slightly bigger
+            queue.submit(CHEST_MATERIAL, lid.draw_mesh, shadow_pass,
+                         matrix=translate(self.x, self.y, self.z) @ scale(0.6))
 
 class Wolf:
+    __slots__ = ('row', 'sound_cooldown', 'last_sound_time') # Transform and animation live in the store
+    BOUNDS = (0.8, 1.6) # Culling sphere: center height above y, radius
+    # Sphere segments per LOD level: (body/head, snout, legs/tail); last level is a body+head proxy
+    LOD_SEGMENTS = ((10, 8, 6), (6, 5, 4), (5, 0, 0))
+    
+    store = wolves
+    x, y, z, rot, anim = Column('x'), Column('y'), Column('z'), Column('rot'), Column('anim')
+    lod = Column('lod', int)
+    
     def __init__(self, x, z):
-        self.x, self.z = x, z
-        self.y = get_height(x, z)
-        self.rot = random.uniform(0, 360)
-        self.anim = 0
+        # State lives in the store; this object is a view of its row
+        self.row = self.store.add(self, x, z, random.uniform(0, 360))
         self.sound_cooldown = random.randint(3000, 8000)
         self.last_sound_time = pygame.time.get_ticks()
         
     def update(self, df):
-        self.anim += 0.1 * df
-        self.rot += 0.5 * df
+        # The main loop ticks whole stores at once; this updates just this wolf
+        self.store.update(df, [self.row])
         
-    def draw(self, shadow_pass=False):
+    def submit(self, queue, shadow_pass=False):
+        queue.submit(FUR_MATERIAL, self.draw)
+
+    def draw(self):
+        # Geometry only - texture and color come from the render queue material
         glPushMatrix()
         glTranslatef(self.x, self.y, self.z)
-        
-        if not shadow_pass:
-             glEnable(GL_TEXTURE_2D); glBindTexture(GL_TEXTURE_2D, texture_ids.get('fur', 0))
-             glColor3f(1,1,1)
-        else:
-             glColor4f(0,0,0, 0.4)
-             
         glRotatef(self.rot, 0, 1, 0)
-        
-        quad = gluNewQuadric(); gluQuadricTexture(quad, GL_TRUE)
+        big, small, limb = self.LOD_SEGMENTS[self.lod]
         
         # Body
-        glPushMatrix(); glTranslatef(0, 0.8, 0); glScalef(0.5, 0.5, 1.0); gluSphere(quad, 1, 10, 10); glPopMatrix()
+        glPushMatrix(); glTranslatef(0, 0.8, 0); glScalef(0.5, 0.5, 1.0); draw_sphere(1, big, big); glPopMatrix()
         # Head
-        glPushMatrix(); glTranslatef(0, 1.3, 0.8); glScalef(0.35, 0.35, 0.4); gluSphere(quad, 1, 10, 10); glPopMatrix()
+        glPushMatrix(); glTranslatef(0, 1.3, 0.8); glScalef(0.35, 0.35, 0.4); draw_sphere(1, big, big); glPopMatrix()
+        
+        if not small:
+            glPopMatrix()
+            return
+        
         # Snout
-        glPushMatrix(); glTranslatef(0, 1.25, 1.15); glScalef(0.15, 0.15, 0.3); gluSphere(quad, 1, 8, 8); glPopMatrix()
+        glPushMatrix(); glTranslatef(0, 1.25, 1.15); glScalef(0.15, 0.15, 0.3); draw_sphere(1, small, small); glPopMatrix()
         
         # Legs
         for x in [-0.3, 0.3]:
@@ -162,7 +170,7 @@ class Wolf:
                 glRotatef(angle, 1, 0, 0)
                 glTranslatef(0, -0.4, 0)
                 glScalef(0.12, 0.4, 0.12)
-                gluSphere(quad, 1, 6, 6)
+                draw_sphere(1, limb, limb)
                 glPopMatrix()
                 
         # Tail
@@ -171,45 +179,43 @@ class Wolf:
         glTranslatef(0, 0.9, -0.9)
         glRotatef(angle - 45, 1, 0, 0)
         glScalef(0.1, 0.1, 0.6)
-        gluSphere(quad, 1, 6, 6)
+        draw_sphere(1, limb, limb)
         glPopMatrix()
         
-        if not shadow_pass: glDisable(GL_TEXTURE_2D)
         glPopMatrix()
 
 class Spider:
+    __slots__ = ('row', 'sound_cooldown', 'last_sound_time')
+    BOUNDS = (0.5, 1.0) # Culling sphere: center height above y, radius
+    # Per LOD level: (abdomen/head segments, leg segments, leg joints drawn)
+    LOD_SEGMENTS = ((8, 4, 2), (5, 3, 1), (4, 0, 0))
+    
+    store = spiders
+    x, y, z, rot, anim = Column('x'), Column('y'), Column('z'), Column('rot'), Column('anim')
+    lod = Column('lod', int)
+    SPEED = 0.05
+    
     def __init__(self, x, z):
-        self.x, self.z = x, z
-        self.y = get_height(x, z)
-        self.rot = random.uniform(0, 360)
-        self.anim = 0
+        self.row = self.store.add(self, x, z, random.uniform(0, 360), self.SPEED)
         self.sound_cooldown = random.randint(4000, 10000)
         self.last_sound_time = pygame.time.get_ticks()
         
     def update(self, df):
-        self.anim += 0.15 * df
-        self.x += math.sin(math.radians(self.rot)) * 0.05 * df
-        self.z += math.cos(math.radians(self.rot)) * 0.05 * df
-        self.y = get_height(self.x, self.z)
-        
-        if random.random() < 0.02 * df:
-             self.rot += random.uniform(-45, 45)
+        self.store.update(df, [self.row])
 
-    def draw(self, shadow_pass=False):
+    def submit(self, queue, shadow_pass=False):
+        queue.submit(SPIDER_MATERIAL, self.draw)
+
+    def draw(self):
         glPushMatrix()
         glTranslatef(self.x, self.y + 0.5, self.z) 
         glRotatef(self.rot, 0, 1, 0)
         
-        if not shadow_pass:
-             glColor3f(0.1, 0.1, 0.1) 
-        else:
-             glColor4f(0,0,0, 0.4)
-             
-        quad = gluNewQuadric()
-        glPushMatrix(); glScalef(0.4, 0.3, 0.5); gluSphere(quad, 1, 8, 8); glPopMatrix() # Abdomen
-        glPushMatrix(); glTranslatef(0, 0.1, 0.4); glScalef(0.2, 0.15, 0.2); gluSphere(quad, 1, 8, 8); glPopMatrix() # Head
+        body, leg, joints = self.LOD_SEGMENTS[self.lod]
+        glPushMatrix(); glScalef(0.4, 0.3, 0.5); draw_sphere(1, body, body); glPopMatrix() # Abdomen
+        glPushMatrix(); glTranslatef(0, 0.1, 0.4); glScalef(0.2, 0.15, 0.2); draw_sphere(1, body, body); glPopMatrix() # Head
         
-        for side in [-1, 1]:
+        for side in ([-1, 1] if joints else []):
             for i in range(4):
                 glPushMatrix()
                 offset_z = 0.2 - i*0.15
@@ -217,16 +223,36 @@ class Spider:
                 lift = math.sin(self.anim + side*i + i*2) * 0.2
                 glRotate(side * 40 - i*10, 0, 1, 0) 
                 glRotate(-30 + lift*30, 0, 0, 1) 
-                glPushMatrix(); glScalef(0.3, 0.05, 0.05); gluSphere(quad, 1, 4, 4); glPopMatrix()
-                glTranslatef(0.3, -0.1, 0)
-                glRotate(side * 60, 0, 0, 1) 
-                glPushMatrix(); glScalef(0.4, 0.05, 0.05); gluSphere(quad, 1, 4, 4); glPopMatrix()
+                glPushMatrix(); glScalef(0.3, 0.05, 0.05); draw_sphere(1, leg, leg); glPopMatrix()
+                if joints > 1:
+                    glTranslatef(0.3, -0.1, 0)
+                    glRotate(side * 60, 0, 0, 1) 
+                    glPushMatrix(); glScalef(0.4, 0.05, 0.05); draw_sphere(1, leg, leg); glPopMatrix()
                 glPopMatrix()
                 
-        if not shadow_pass: glDisable(GL_TEXTURE_2D)
         glPopMatrix()
 
+def draw_static_parts(parts, shadow_pass=False):
+    # Immediate draw of static_parts() - used when a prop is drawn on its own instead of baked
+    if shadow_pass:
+         glColor4f(0, 0, 0, 0.4)
+         disable(GL_TEXTURE_2D)
+    else:
+         enable(GL_TEXTURE_2D)
+    for tex_key, color, prim, matrix in parts:
+        if not shadow_pass:
+            bind_texture(textures.id(tex_key))
+            glColor3f(*color)
+            profiler.count('texture_binds')
+        glPushMatrix()
+        glMultMatrixf(matrix.T.astype('float32').ravel())
+        primitive_mesh(*prim).draw()
+        glPopMatrix()
+    disable(GL_TEXTURE_2D)
+
 class Mushroom:
+    __slots__ = ('x', 'y', 'z', 'scale')
+
     def __init__(self, x, z):
         self.x, self.y, self.z = x, get_height(x, z), z
         # Randomize size
@@ -235,88 +261,53 @@ class Mushroom:
     def update(self, df):
         pass # Static
         
-    def draw(self, shadow_pass=False):
-        glPushMatrix()
-        glTranslatef(self.x, self.y, self.z)
-        glScalef(self.scale, self.scale, self.scale)
-        
-        quad = gluNewQuadric(); gluQuadricTexture(quad, GL_TRUE)
-        
-        if shadow_pass:
-             glColor4f(0, 0, 0, 0.4)
-             glDisable(GL_TEXTURE_2D)
-        else:
-             glColor3f(1,1,1)
-             glEnable(GL_TEXTURE_2D)
-             
-        # Stem
-        if not shadow_pass: glBindTexture(GL_TEXTURE_2D, texture_ids.get('mushroom_stem', 0))
-        glPushMatrix()
-        glRotatef(-90, 1, 0, 0)
-        gluCylinder(quad, 0.1, 0.15, 0.4, 8, 2)
-        glPopMatrix()
-        
-        # Cap
-        if not shadow_pass: glBindTexture(GL_TEXTURE_2D, texture_ids.get('mushroom_cap', 0))
-        glPushMatrix()
-        glTranslatef(0, 0.4, 0)
-        glRotatef(-90, 1, 0, 0)
-        # Disk bottom
-        gluDisk(quad, 0.1, 0.4, 10, 2)
-        # Top
-        glTranslatef(0, 0, 0) 
-        # Half sphere or Cone
-        # Let's do a squashed sphere
-        glScalef(1, 1, 0.6)
-        gluSphere(quad, 0.4, 10, 10)
-        glPopMatrix()
+    def static_parts(self):
+        # (texture, color, primitive, world matrix) for the static batcher
+        base = translate(self.x, self.y, self.z) @ scale(self.scale)
+        cap = base @ translate(0, 0.4, 0) @ rotate_x(-90)
+        white = (1.0, 1.0, 1.0)
+        return [
+            # Stem
+            ('mushroom_stem', white, ('cylinder', 0.1, 0.15, 0.4, 8, 2), base @ rotate_x(-90)),
+            # Cap - disk bottom and a squashed sphere on top
+            ('mushroom_cap', white, ('disk', 0.1, 0.4, 10, 2), cap),
+            ('mushroom_cap', white, ('sphere', 10, 10), cap @ scale(1, 1, 0.6) @ scale(0.4)),
+        ]
         
-        if not shadow_pass: glDisable(GL_TEXTURE_2D)
-        glPopMatrix()
+    def draw(self, shadow_pass=False):
+        draw_static_parts(self.static_parts(), shadow_pass)
 
 class Rock:
+    __slots__ = ('x', 'y', 'z', 'scale', 'rot', 'shape_seed', 'lumps')
+
     def __init__(self, x, z):
         self.x, self.z = x, z
-        self.y = get_height(x, z), z
         self.y = get_height(x, z)
         self.scale = random.uniform(0.8, 1.5)
         self.rot = random.uniform(0, 360)
         # Generate random distortion for rock shape
         self.shape_seed = random.randint(0, 100)
+        # Lump layout fixed once, from a private generator (leaves the global random state alone)
+        rng = random.Random(self.shape_seed)
+        self.lumps = []
+        for i in range(3):
+            rx, ry, rz = rng.uniform(-0.3, 0.3), rng.uniform(0, 0.3), rng.uniform(-0.3, 0.3)
+            self.lumps.append((rx, ry, rz, rng.uniform(0.2, 0.4)))
         
     def update(self, df):
         pass
         
-    def draw(self, shadow_pass=False):
-        glPushMatrix()
-        glTranslatef(self.x, self.y + 0.2*self.scale, self.z) # Sink slightly
-        glRotatef(self.rot, 0, 1, 0)
-        glScalef(self.scale, self.scale*0.7, self.scale)
-        
-        quad = gluNewQuadric(); gluQuadricTexture(quad, GL_TRUE)
-        
-        if shadow_pass:
-             glColor4f(0, 0, 0, 0.4)
-             glDisable(GL_TEXTURE_2D)
-        else:
-             # Darker grey
-             glColor3f(0.6, 0.6, 0.65)
-             glEnable(GL_TEXTURE_2D)
-             glBindTexture(GL_TEXTURE_2D, texture_ids.get('rock_wall', 0))
-             
+    def static_parts(self):
+        # (texture, color, primitive, world matrix) for the static batcher
+        base = (translate(self.x, self.y + 0.2*self.scale, self.z) # Sink slightly
+                @ rotate_y(self.rot) @ scale(self.scale, self.scale*0.7, self.scale))
+        grey = (0.6, 0.6, 0.65) # Darker grey
         # Main body
-        gluSphere(quad, 0.5, 8, 8)
-        
+        parts = [('rock_wall', grey, ('sphere', 8, 8), base @ scale(0.5))]
         # Detail lumps
-        random.seed(self.shape_seed)
-        for i in range(3):
-            glPushMatrix()
-            rx, ry, rz = random.uniform(-0.3, 0.3), random.uniform(0, 0.3), random.uniform(-0.3, 0.3)
-            glTranslatef(rx, ry, rz)
-            s = random.uniform(0.2, 0.4)
-            glScalef(s, s, s)
-            gluSphere(quad, 0.5, 6, 6)
-            glPopMatrix()
-            
-        if not shadow_pass: glDisable(GL_TEXTURE_2D)
-        glPopMatrix()
\ No newline at end of file
+        for rx, ry, rz, s in self.lumps:
+            parts.append(('rock_wall', grey, ('sphere', 6, 6), base @ translate(rx, ry, rz) @ scale(s * 0.5)))
+        return parts
+        
+    def draw(self, shadow_pass=False):
+        draw_static_parts(self.static_parts(), shadow_pass)
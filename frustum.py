@@ -0,0 +1,85 @@
+"""
+View-frustum culling - planes from the camera, vectorized sphere and box tests
+"""
+import math
+import numpy as np
+
+def perspective(fov, aspect, near, far):
+    """Same matrix as gluPerspective (row-major, column vectors)"""
+    f = 1.0 / math.tan(math.radians(fov) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ], dtype=np.float64)
+
+def look_at(eye, target, up=(0, 1, 0)):
+    """Same matrix as gluLookAt"""
+    eye = np.asarray(eye, dtype=np.float64)
+    f = np.asarray(target, dtype=np.float64) - eye
+    f /= np.linalg.norm(f)
+    s = np.cross(f, up); s /= np.linalg.norm(s)
+    u = np.cross(s, f)
+    m = np.eye(4)
+    m[0, 0:3] = s; m[1, 0:3] = u; m[2, 0:3] = -f
+    m[0:3, 3] = -m[0:3, 0:3] @ eye
+    return m
+
+class Frustum:
+    """Six inward-facing planes (a, b, c, d), rebuilt from the camera every frame"""
+    def __init__(self):
+        self.planes = None
+        self.eye = np.zeros(3)
+        self.max_dist = None
+        # category -> [visible, culled], reset each frame
+        self.stats = {}
+
+    def update(self, eye, target, fov, aspect, near, far, max_dist=None):
+        clip = perspective(fov, aspect, near, far) @ look_at(eye, target)
+        r0, r1, r2, r3 = clip
+        # Gribb & Hartmann: left, right, bottom, top, near, far
+        planes = np.array([r3 + r0, r3 - r0, r3 + r1, r3 - r1, r3 + r2, r3 - r2])
+        planes /= np.linalg.norm(planes[:, 0:3], axis=1, keepdims=True)
+        self.planes = planes
+        self.eye = np.asarray(eye, dtype=np.float64)
+        self.max_dist = max_dist
+        self.stats = {}
+
+    def _count(self, category, mask):
+        visible = int(np.count_nonzero(mask))
+        entry = self.stats.setdefault(category, [0, 0])
+        entry[0] += visible
+        entry[1] += len(mask) - visible
+
+    def cull_spheres(self, centers, radii, category=None):
+        """Bool mask of spheres that touch the frustum (and lie within max_dist, if set)"""
+        centers = np.asarray(centers, dtype=np.float64).reshape(-1, 3)
+        if self.planes is None or not len(centers):
+            return np.ones(len(centers), dtype=bool)
+        dist = centers @ self.planes[:, 0:3].T + self.planes[:, 3]
+        mask = (dist >= -np.reshape(radii, (-1, 1))).all(axis=1)
+        if self.max_dist is not None:
+            d2 = ((centers - self.eye)**2).sum(axis=1)
+            mask &= d2 <= (self.max_dist + np.asarray(radii))**2
+        if category: self._count(category, mask)
+        return mask
+
+    def cull_boxes(self, lo, hi, category=None):
+        """Bool mask of axis-aligned boxes (N, 3) that touch the frustum"""
+        lo = np.asarray(lo, dtype=np.float64).reshape(-1, 3)
+        hi = np.asarray(hi, dtype=np.float64).reshape(-1, 3)
+        if self.planes is None or not len(lo):
+            return np.ones(len(lo), dtype=bool)
+        normals = self.planes[:, 0:3]
+        # p-vertex: the corner furthest along each plane normal
+        pv = np.where(normals[None, :, :] >= 0, hi[:, None, :], lo[:, None, :])
+        mask = (np.einsum('bpj,pj->bp', pv, normals) + self.planes[:, 3] >= 0).all(axis=1)
+        if self.max_dist is not None:
+            nearest = np.clip(self.eye, lo, hi)
+            mask &= ((nearest - self.eye)**2).sum(axis=1) <= self.max_dist**2
+        if category: self._count(category, mask)
+        return mask
+
+    def summary(self):
+        return ", ".join(f"{k}: {v}/{v + c}" for k, (v, c) in sorted(self.stats.items()))
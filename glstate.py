@@ -0,0 +1,71 @@
+"""
+GL state cache - shadows glEnable/glDisable capabilities and the 2D texture binding in Python
+and only forwards real changes, since every PyOpenGL call is a round trip
+"""
+from OpenGL.GL import glEnable, glDisable, glBindTexture, GL_TEXTURE_2D
+from profiler import profiler
+
+class GLStateCache:
+    """
+    enable(GL_FOG) / disable(GL_FOG) / bind_texture(tid) skip the GL call when the value is already set.
+    Anything that changes state behind the cache (glPopAttrib, a new context) must call invalidate();
+    deleting a bound texture rebinds 0, so deletions go through forget_texture().
+    issued / skipped count calls over the whole run; flush_counts() hands the frame's share to the profiler.
+    """
+    def __init__(self):
+        self.caps = {}        # cap -> bool, missing = unknown
+        self.texture = None   # Bound GL_TEXTURE_2D id, None = unknown
+        self.issued = 0
+        self.skipped = 0
+        self._flushed = (0, 0)
+
+    def enable(self, cap):
+        if self.caps.get(cap) is True:
+            self.skipped += 1
+            return
+        glEnable(cap)
+        self.caps[cap] = True
+        self.issued += 1
+
+    def disable(self, cap):
+        if self.caps.get(cap) is False:
+            self.skipped += 1
+            return
+        glDisable(cap)
+        self.caps[cap] = False
+        self.issued += 1
+
+    def set(self, cap, on):
+        if on: self.enable(cap)
+        else: self.disable(cap)
+
+    def bind_texture(self, tid):
+        if tid == self.texture:
+            self.skipped += 1
+            return
+        glBindTexture(GL_TEXTURE_2D, tid)
+        self.texture = tid
+        self.issued += 1
+
+    def forget_texture(self, tid):
+        if tid == self.texture: self.texture = 0
+
+    def invalidate(self):
+        self.caps.clear()
+        self.texture = None
+
+    def flush_counts(self):
+        """Per-frame 'gl_state_issued' / 'gl_state_skipped' profiler counters"""
+        issued, skipped = self._flushed
+        profiler.count('gl_state_issued', self.issued - issued)
+        profiler.count('gl_state_skipped', self.skipped - skipped)
+        self._flushed = (self.issued, self.skipped)
+
+    def summary(self):
+        total = self.issued + self.skipped
+        return f"{self.issued} issued, {self.skipped} skipped ({100 * self.skipped / total if total else 0:.0f}%)"
+
+gl_state = GLStateCache()
+enable = gl_state.enable
+disable = gl_state.disable
+bind_texture = gl_state.bind_texture
@@ -0,0 +1,191 @@
+"""
+Instanced rendering - per-type instance buffers drawn with one call per mesh
+"""
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+from mesh import unbind as unbind_mesh
+from profiler import profiler
+from glstate import enable, disable, bind_texture
+
+# Instance row: x, y, z, scale, yaw (degrees)
+INSTANCE_FLOATS = 5
+INSTANCE_STRIDE = INSTANCE_FLOATS * 4
+
+# Fixed-function look reproduced for one directional light (GL_LIGHT0),
+# GL_COLOR_MATERIAL, linear fog and alpha test
+_VERTEX_SRC = """
+#version 120
+attribute vec4 inst_pos_scale;
+attribute float inst_yaw;
+uniform vec3 axis_scale;
+uniform int lit;
+
+vec3 rotate_y(vec3 v, float c, float s) {
+    return vec3(c*v.x + s*v.z, v.y, -s*v.x + c*v.z);
+}
+
+vec4 shade(vec3 n) {
+    vec3 l = normalize(gl_LightSource[0].position.xyz);
+    vec3 light = gl_LightModel.ambient.rgb + gl_LightSource[0].ambient.rgb
+               + gl_LightSource[0].diffuse.rgb * max(dot(n, l), 0.0);
+    return vec4(gl_Color.rgb * light, gl_Color.a);
+}
+
+void main() {
+    float a = radians(inst_yaw);
+    float c = cos(a), s = sin(a);
+    vec3 p = rotate_y(gl_Vertex.xyz * axis_scale * inst_pos_scale.w, c, s) + inst_pos_scale.xyz;
+    vec4 eye = gl_ModelViewMatrix * vec4(p, 1.0);
+    gl_Position = gl_ProjectionMatrix * eye;
+    gl_FogFragCoord = abs(eye.z);
+    gl_TexCoord[0] = gl_MultiTexCoord0;
+
+    if (lit == 1) {
+        vec3 n = normalize(gl_NormalMatrix * rotate_y(gl_Normal / axis_scale, c, s));
+        gl_FrontColor = shade(n);
+        gl_BackColor = shade(-n);
+    } else {
+        gl_FrontColor = gl_Color;
+        gl_BackColor = gl_Color;
+    }
+}
+"""
+
+_FRAGMENT_SRC = """
+#version 120
+uniform sampler2D tex;
+uniform int textured;
+uniform float alpha_ref;
+
+void main() {
+    vec4 c = gl_Color;
+    if (textured == 1) c *= texture2D(tex, gl_TexCoord[0].st);
+    if (c.a <= alpha_ref) discard;
+    float f = clamp((gl_Fog.end - gl_FogFragCoord) * gl_Fog.scale, 0.0, 1.0);
+    gl_FragColor = vec4(mix(gl_Fog.color.rgb, c.rgb, f), c.a);
+}
+"""
+
+_program = None
+_locs = {}
+_supported = None
+
+def instancing_supported():
+    """Compile the instancing shader on first use; False if the driver can't do it"""
+    global _program, _supported
+    if _supported is not None: return _supported
+    _supported = False
+    try:
+        if not (bool(glDrawElementsInstanced) and bool(glVertexAttribDivisor)):
+            return False
+        _program = shaders.compileProgram(
+            shaders.compileShader(_VERTEX_SRC, GL_VERTEX_SHADER),
+            shaders.compileShader(_FRAGMENT_SRC, GL_FRAGMENT_SHADER))
+        for name in ('inst_pos_scale', 'inst_yaw'):
+            _locs[name] = glGetAttribLocation(_program, name)
+        for name in ('axis_scale', 'lit', 'tex', 'textured', 'alpha_ref'):
+            _locs[name] = glGetUniformLocation(_program, name)
+        _supported = True
+    except Exception as e:
+        print(f"Instancing unavailable, using per-instance fallback: {e}")
+    return _supported
+
+class InstanceBatch:
+    """Instance buffer for one mesh type. Rows are x, y, z, scale, yaw."""
+    def __init__(self, axis_scale=(1.0, 1.0, 1.0)):
+        self.axis_scale = tuple(float(a) for a in axis_scale)
+        self.data = np.zeros((0, INSTANCE_FLOATS), dtype=np.float32)
+        self.vbo = None
+        self._dirty = True
+        self._matrices = None
+
+    def __len__(self):
+        return len(self.data)
+
+    def set_instances(self, data):
+        self.data = np.ascontiguousarray(data, dtype=np.float32).reshape(-1, INSTANCE_FLOATS)
+        self._dirty = True
+        self._matrices = None
+
+    def matrices(self):
+        """Column-major model matrices (N, 16) for glMultMatrixf, built in one vectorized pass"""
+        if self._matrices is None:
+            d = self.data
+            a = np.radians(d[:, 4]); c, s = np.cos(a), np.sin(a)
+            sx, sy, sz = (d[:, 3:4] * self.axis_scale).T
+            m = np.zeros((len(d), 4, 4), dtype=np.float32)
+            # Translate * RotateY * Scale, stored column by column
+            m[:, 0, 0] = c * sx;  m[:, 0, 2] = -s * sx
+            m[:, 1, 1] = sy
+            m[:, 2, 0] = s * sz;  m[:, 2, 2] = c * sz
+            m[:, 3, 0:3] = d[:, 0:3]; m[:, 3, 3] = 1.0
+            self._matrices = m.reshape(-1, 16)
+        return self._matrices
+
+    def _upload(self):
+        if self.vbo is None: self.vbo = int(glGenBuffers(1))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.data.nbytes, self.data, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._dirty = False
+
+    def draw_model(self, model, shadow_pass=False, alpha_ref=0.0):
+        """Draw every instance of an ObjModel - one instanced call per material"""
+        if not len(self.data) or model is None: return
+        if not instancing_supported():
+            model.mesh.bind()
+            for mat in self.matrices():
+                glPushMatrix(); glMultMatrixf(mat)
+                model.draw_ranges(shadow_pass)
+                glPopMatrix()
+            unbind_mesh()
+            return
+        if self._dirty: self._upload()
+
+        glUseProgram(_program)
+        profiler.count('shader_binds')
+        glUniform3f(_locs['axis_scale'], *self.axis_scale)
+        glUniform1i(_locs['lit'], 0 if shadow_pass else 1)
+        glUniform1i(_locs['textured'], 0 if shadow_pass else 1)
+        glUniform1i(_locs['tex'], 0)
+        glUniform1f(_locs['alpha_ref'], alpha_ref)
+        enable(GL_VERTEX_PROGRAM_TWO_SIDE)
+
+        model.mesh.bind()
+        self._bind_instance_attribs()
+        for tex_id, color, first, count in model.groups:
+            if not shadow_pass:
+                bind_texture(tex_id)
+                glColor3f(*color)
+                profiler.count('texture_binds')
+            profiler.count('draw_calls')
+            glDrawElementsInstanced(GL_TRIANGLES, count, GL_UNSIGNED_INT,
+                                    ctypes.c_void_p(first * 4), len(self.data))
+        self._unbind_instance_attribs()
+        unbind_mesh()
+
+        disable(GL_VERTEX_PROGRAM_TWO_SIDE)
+        glUseProgram(0)
+
+    def _bind_instance_attribs(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        loc_ps, loc_yaw = _locs['inst_pos_scale'], _locs['inst_yaw']
+        glEnableVertexAttribArray(loc_ps)
+        glVertexAttribPointer(loc_ps, 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, None)
+        glVertexAttribDivisor(loc_ps, 1)
+        glEnableVertexAttribArray(loc_yaw)
+        glVertexAttribPointer(loc_yaw, 1, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(16))
+        glVertexAttribDivisor(loc_yaw, 1)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def _unbind_instance_attribs(self):
+        for loc in (_locs['inst_pos_scale'], _locs['inst_yaw']):
+            glVertexAttribDivisor(loc, 0)
+            glDisableVertexAttribArray(loc)
+
+    def delete(self):
+        if self.vbo: glDeleteBuffers(1, [self.vbo])
+        self.vbo = None
+        self._dirty = True
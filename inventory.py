@@ -1,7 +1,11 @@
 import pygame
 from OpenGL.GL import *
 from config import WIDTH, HEIGHT
-from utils import draw_rect, draw_textured_rect, draw_ui_text, texture_ids, load_texture
+from utils import draw_rect, draw_sprite, draw_ui_text
+from textures import textures
+from ui_batch import flush_ui
+from profiler import profiled
+from glstate import enable
 
 class Item:
     def __init__(self, name, icon_texture, item_type="misc"):
@@ -40,27 +44,26 @@ class Inventory:
                 
         return False
 
+def item_icon(item):
+    # Texture name of an item's icon, None if it has none loaded
+    if item.type == 'weapon' and 'icon_sword' in textures: return 'icon_sword'
+    if item.name == 'Bread' and 'icon_bread' in textures: return 'icon_bread'
+    return None
+
 # UI Drawing Logic
+@profiled('draw_inventory')
 def draw_inventory(player, font):
     # Consume mouse rel to avoid drift
     pygame.mouse.get_rel() 
     
-    # Load Textures
-    if 'ui_inventory_bg' not in texture_ids:
-        load_texture('ui_inventory_bg', 'ui_inventory_bg.png')
-    if 'ui_inventory_slot' not in texture_ids:
-        load_texture('ui_inventory_slot', 'ui_inventory_slot.png')
-    if 'icon_sword' not in texture_ids:
-        load_texture('icon_sword', 'icon_sword.png')
-    if 'icon_bread' not in texture_ids:
-        load_texture('icon_bread', 'icon_bread.png')
         
-    tid_bg = texture_ids.get('ui_inventory_bg', 0)
-    tid_slot = texture_ids.get('ui_inventory_slot', 0)
+    # Loaded on first use (one atlas for the panel, slot and icons)
+    tid_bg = textures.id('ui_inventory_bg')
+    tid_slot = textures.id('ui_inventory_slot')
     
     # Dim BG
-    glEnable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
-    draw_rect(0, 0, WIDTH, HEIGHT, (0, 0, 0, 0.85))
+    enable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+    draw_rect(0, 0, WIDTH, HEIGHT, (0, 0, 0, 0.85), z=0)
     
     # Scaling
     ui_scale = HEIGHT / 1080.0
@@ -77,9 +80,9 @@ def draw_inventory(player, font):
     
     # Draw Background (The Zoned Panel V2)
     if tid_bg:
-        draw_textured_rect(px, py, p_w, p_h, tid_bg, (1,1,1,1))
+        draw_sprite('ui_inventory_bg', px, py, p_w, p_h, (1,1,1,1), z=1)
     else:
-        draw_rect(px, py, p_w, p_h, (0.2,0.2,0.2,1))
+        draw_rect(px, py, p_w, p_h, (0.2,0.2,0.2,1), z=1)
         
     # --- MODULAR SLOT CONFIGURATION (4.0) ---
     slot_size = s(75) 
@@ -98,27 +101,24 @@ def draw_inventory(player, font):
     def draw_modular_slot(x, y, size, item, is_drag_src, slot_tex_id):
         # 1. Draw Frame
         if slot_tex_id:
-            draw_textured_rect(x, y, size, size, slot_tex_id)
+            draw_sprite('ui_inventory_slot', x, y, size, size, z=2)
         else:
-            draw_rect(x, y, size, size, (0.3, 0.3, 0.3, 1))
+            draw_rect(x, y, size, size, (0.3, 0.3, 0.3, 1), z=2)
             
         # 2. Draw Interaction Highlight
         hover = x < mx < x+size and y < my < y+size
         if hover:
-            draw_rect(x+s(5), y+s(5), size-s(10), size-s(10), (1, 1, 0.5, 0.1))
+            draw_rect(x+s(5), y+s(5), size-s(10), size-s(10), (1, 1, 0.5, 0.1), z=3)
             
         # 3. Draw Item
         if item and not is_drag_src:
              # Draw Icon
-            icon_id = 0
-            if item.type == 'weapon' and 'icon_sword' in texture_ids: icon_id = texture_ids['icon_sword']
-            elif item.name == 'Bread' and 'icon_bread' in texture_ids: icon_id = texture_ids['icon_bread']
-            
-            if icon_id:
-                draw_textured_rect(x+s(10), y+s(10), size-s(20), size-s(20), icon_id)
+            icon = item_icon(item)
+            if icon:
+                draw_sprite(icon, x+s(10), y+s(10), size-s(20), size-s(20), z=4)
             else:
                  col = (0.8, 0.2, 0.2, 1) if item.type == 'weapon' else (0.2, 0.8, 0.2, 1)
-                 draw_rect(x+10, y+10, size-20, size-20, col)
+                 draw_rect(x+10, y+10, size-20, size-20, col, z=4)
                  draw_ui_text(font, item.name[:3], x+s(15), y+size//2, (255,255,255))
         return hover
         
@@ -174,14 +174,16 @@ def draw_inventory(player, font):
                 inv.drag_source = ('pocket', i)
                 inv.pockets[i] = None
 
+    flush_ui()
+
     # === CHEST PANEL (If Open) ===
     if has_chest:
         chest_x = px + p_w + s(30)
         chest_y = py
         
         # Draw Chest Panel BG (Fallback Dark)
-        draw_rect(chest_x+s(5), chest_y-s(5), p_w, p_h, (0,0,0,0.5)) # Shadow
-        draw_rect(chest_x, chest_y, p_w, p_h, (0.1, 0.08, 0.08, 0.95))
+        draw_rect(chest_x+s(5), chest_y-s(5), p_w, p_h, (0,0,0,0.5), z=0) # Shadow
+        draw_rect(chest_x, chest_y, p_w, p_h, (0.1, 0.08, 0.08, 0.95), z=1)
         draw_ui_text(font, "CHEST", chest_x+s(20), chest_y+p_h-s(35), (200, 180, 150))
         
         c_items = inv.opened_container.items
@@ -196,10 +198,10 @@ def draw_inventory(player, font):
              is_src = (inv.drag_item and inv.drag_source == ('chest', i))
              
              # Draw Slot BG
-             draw_rect(sx, sy, slot_size, slot_size, (0.2, 0.15, 0.1, 1))
+             draw_rect(sx, sy, slot_size, slot_size, (0.2, 0.15, 0.1, 1), z=2)
              
              if sx < mx < sx+slot_size and sy < my < sy+slot_size:
-                 draw_rect(sx, sy, slot_size, slot_size, (1, 1, 0.5, 0.1))
+                 draw_rect(sx, sy, slot_size, slot_size, (1, 1, 0.5, 0.1), z=3)
                  if pygame.mouse.get_pressed()[0] and not inv.drag_item and item:
                      inv.drag_item = item
                      inv.drag_source = ('chest', i)
@@ -211,26 +213,23 @@ def draw_inventory(player, font):
                      
              if item and not is_src:
                  # Draw Icon
-                icon_id = 0
-                if item.type == 'weapon' and 'icon_sword' in texture_ids: icon_id = texture_ids['icon_sword']
-                elif item.name == 'Bread' and 'icon_bread' in texture_ids: icon_id = texture_ids['icon_bread']
-                
-                if icon_id:
-                    draw_textured_rect(sx+s(5), sy+s(5), slot_size-s(10), slot_size-s(10), icon_id)
+                icon = item_icon(item)
+                if icon:
+                    draw_sprite(icon, sx+s(5), sy+s(5), slot_size-s(10), slot_size-s(10), z=4)
                 else:
-                     draw_rect(sx+5, sy+5, slot_size-10, slot_size-10, (100, 100, 100))
+                     draw_rect(sx+5, sy+5, slot_size-10, slot_size-10, (100, 100, 100), z=4)
                      draw_ui_text(font, item.name[:3], sx+s(10), sy+size//2, (255,255,255))
 
+    flush_ui() # The dragged item is drawn over the slot labels
+
     # --- DRAG & DROP ITEM DRAWING & LOGIC ---
     if inv.drag_item:
         # Draw Floating Item
-        draw_rect(mx-s(35), my-s(35), s(70), s(70), (0.5, 0.5, 0.6, 0.5))
+        draw_rect(mx-s(35), my-s(35), s(70), s(70), (0.5, 0.5, 0.6, 0.5), z=0)
         # Icon
-        icon_id = 0
-        if inv.drag_item.type == 'weapon' and 'icon_sword' in texture_ids: icon_id = texture_ids['icon_sword']
-        elif inv.drag_item.name == 'Bread' and 'icon_bread' in texture_ids: icon_id = texture_ids['icon_bread']
-        if icon_id:
-            draw_textured_rect(mx-s(35), my-s(35), s(70), s(70), icon_id)
+        icon = item_icon(inv.drag_item)
+        if icon:
+            draw_sprite(icon, mx-s(35), my-s(35), s(70), s(70), z=1)
         
         # DROP HANDLER
         if not pygame.mouse.get_pressed()[0]:
@@ -0,0 +1,141 @@
+"""
+Level of detail - distance-based level selection with hysteresis, and billboard tree impostors
+"""
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from config import LOD_HYSTERESIS
+from profiler import profiler
+from glstate import gl_state, enable, disable, bind_texture
+
+class LODSelector:
+    """
+    Level i is used up to thresholds[i]; past the last threshold the coarsest level applies.
+    A level only changes once the distance is `hysteresis` past a boundary, so objects
+    hovering around a threshold don't pop back and forth. Works on scalars and arrays.
+    """
+    def __init__(self, thresholds, hysteresis=LOD_HYSTERESIS):
+        self.thresholds = tuple(sorted(thresholds))
+        self.hysteresis = hysteresis
+
+    @property
+    def levels(self):
+        return len(self.thresholds) + 1
+
+    def select(self, current, distance):
+        level = np.asarray(current, dtype=np.int8)
+        dist = np.asarray(distance, dtype=np.float64)
+        h = self.hysteresis
+        # Coarsen: crossed a boundary outwards by more than h
+        for i, t in enumerate(self.thresholds):
+            level = np.where((level <= i) & (dist > t + h), i + 1, level)
+        # Refine: crossed a boundary inwards by more than h
+        for i in reversed(range(len(self.thresholds))):
+            level = np.where((level > i) & (dist < self.thresholds[i] - h), i, level)
+        return level.astype(np.int8) if level.ndim else int(level)
+
+class TreeImpostor:
+    """
+    The tree model rendered once into a texture (side view), drawn far away as
+    camera-facing quads - one glDrawArrays for every impostor tree.
+    """
+    def __init__(self, size=256):
+        self.size = size
+        self.texture = 0
+        self.ok = None  # None = not baked yet, False = FBOs unavailable
+
+    def bake(self, model):
+        self.ok = False
+        if model is None: return False
+        try:
+            if not bool(glGenFramebuffers): return False
+            lo, hi = model.mesh.lo, model.mesh.hi
+            self.half_width = float(max(abs(lo[0]), abs(hi[0]), abs(lo[2]), abs(hi[2])))
+            self.bottom, self.top = float(lo[1]), float(hi[1])
+
+            tex = glGenTextures(1)
+            bind_texture(tex)
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.size, self.size, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+            glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+
+            fbo = glGenFramebuffers(1)
+            depth = glGenRenderbuffers(1)
+            glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+            glFramebufferTexture2D(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_TEXTURE_2D, tex, 0)
+            glBindRenderbuffer(GL_RENDERBUFFER, depth)
+            glRenderbufferStorage(GL_RENDERBUFFER, GL_DEPTH_COMPONENT24, self.size, self.size)
+            glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_DEPTH_ATTACHMENT, GL_RENDERBUFFER, depth)
+
+            if glCheckFramebufferStatus(GL_FRAMEBUFFER) == GL_FRAMEBUFFER_COMPLETE:
+                glPushAttrib(GL_ALL_ATTRIB_BITS)
+                glMatrixMode(GL_PROJECTION); glPushMatrix(); glLoadIdentity()
+                glOrtho(-self.half_width, self.half_width, self.bottom, self.top, -self.half_width - 1, self.half_width + 1)
+                glMatrixMode(GL_MODELVIEW); glPushMatrix(); glLoadIdentity()
+
+                glViewport(0, 0, self.size, self.size)
+                glClearColor(0, 0, 0, 0)
+                glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+                enable(GL_DEPTH_TEST)
+                disable(GL_LIGHTING); disable(GL_FOG); disable(GL_BLEND); disable(GL_CULL_FACE)
+                model.draw()
+
+                glMatrixMode(GL_PROJECTION); glPopMatrix()
+                glMatrixMode(GL_MODELVIEW); glPopMatrix()
+                glPopAttrib()
+                gl_state.invalidate() # The pop restored state the cache didn't see
+                self.texture = tex
+                self.ok = True
+            else:
+                glDeleteTextures([tex]); gl_state.forget_texture(tex)
+
+            glBindFramebuffer(GL_FRAMEBUFFER, 0)
+            glDeleteRenderbuffers(1, [depth])
+            glDeleteFramebuffers(1, [fbo])
+        except Exception as e:
+            print(f"Tree impostor unavailable: {e}")
+            gl_state.invalidate()
+            self.ok = False
+        return self.ok
+
+    def draw(self, instances, eye, tint=(0.55, 0.55, 0.6)):
+        """instances: (N, 5) rows of x, y, z, scale, yaw. Quads turn about Y to face the eye."""
+        if not self.ok or not len(instances): return
+        pos = instances[:, 0:3].astype(np.float64)
+        s = instances[:, 3:4].astype(np.float64)
+
+        to_eye = np.asarray(eye, dtype=np.float64)[[0, 2]] - pos[:, [0, 2]]
+        to_eye /= np.maximum(np.linalg.norm(to_eye, axis=1, keepdims=True), 1e-9)
+        right = np.zeros_like(pos)
+        right[:, 0] = -to_eye[:, 1]; right[:, 2] = to_eye[:, 0]
+        right *= self.half_width * s
+
+        base = pos.copy(); base[:, 1] += self.bottom * s[:, 0]
+        top = pos.copy(); top[:, 1] += self.top * s[:, 0]
+
+        quads = np.empty((len(pos), 4, 5), dtype=np.float32)
+        quads[:, 0, 0:3] = base - right; quads[:, 0, 3:5] = (0, 0)
+        quads[:, 1, 0:3] = base + right; quads[:, 1, 3:5] = (1, 0)
+        quads[:, 2, 0:3] = top + right;  quads[:, 2, 3:5] = (1, 1)
+        quads[:, 3, 0:3] = top - right;  quads[:, 3, 3:5] = (0, 1)
+        quads = quads.reshape(-1, 5)
+
+        # Lighting was left out of the bake, so approximate the lit look with a flat tint
+        disable(GL_LIGHTING)
+        enable(GL_TEXTURE_2D)
+        bind_texture(self.texture)
+        glColor3f(*tint)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, 20, quads)
+        # Same interleaved buffer 12 bytes in; a quads[:, 3:] view would be repacked without the stride
+        glTexCoordPointer(2, GL_FLOAT, 20, ctypes.c_void_p(quads.ctypes.data + 12))
+        glDrawArrays(GL_QUADS, 0, len(quads))
+        profiler.count('draw_calls')
+        profiler.count('texture_binds')
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glColor3f(1, 1, 1)
+        enable(GL_LIGHTING)
@@ -2,6 +2,7 @@ import sys
 import math
 import random
 import pygame
+import numpy as np
 from pygame.locals import *
 from OpenGL.GL import *
 from OpenGL.GLU import *
@@ -9,38 +10,56 @@ from OpenGL.GLU import *
 # Modules
 import config
 from config import WIDTH, HEIGHT, FOV, MOUSE_SENS, SPEED, FOOTSTEP_COOLDOWN, C_SKY, C_AMBIENT
-from utils import load_texture, load_obj_display_list, load_sfx, draw_rect, draw_ui_text, sfx_sounds, display_lists, texture_ids
-from world import get_height, shadow_projection, draw_ground
-from entities import Player, Chest, Wolf, Spider, Mushroom, Rock
+from utils import draw_rect, draw_ui_text, sfx_sounds, display_lists
+from textures import textures
+from atlas import register_ui_atlas
+from world import get_height, shadow_projection, draw_ground, update_ground
+from entities import Player, Chest, Wolf, Spider
 from inventory import draw_inventory, Item
 from menu import Menu
+from instancing import InstanceBatch, instancing_supported
+from primitives import draw_sphere
+from static_batch import StaticBatcher
+from spatial import SpatialGrid
+from frustum import Frustum
+from ui_batch import flush_ui
+from lod import LODSelector, TreeImpostor
+from depth_order import DepthOrder
+from render_queue import RenderQueue, material
+from assets import AssetLoader
+import worldgen
+from mobs import MOB_STORES, update_mobs
+from timestep import FixedTimestep, Interpolator
+from profiler import profiler
+from glstate import gl_state, enable, disable
 
 # Initial Setup
 pygame.init()
 pygame.mixer.init()
 
 # Display
-screen = pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL | RESIZABLE)
+screen = pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL | RESIZABLE | (pygame.HIDDEN if config.WINDOW_HIDDEN else 0),
+                                 vsync=int(config.VSYNC))
 pygame.display.set_caption("Giera | Refactored")
 pygame.mouse.set_visible(False)
 pygame.event.set_grab(True)
 
 # OpenGL Init
-glEnable(GL_DEPTH_TEST)
-glEnable(GL_LIGHTING)
-glEnable(GL_COLOR_MATERIAL)
-glEnable(GL_NORMALIZE)
+enable(GL_DEPTH_TEST)
+enable(GL_LIGHTING)
+enable(GL_COLOR_MATERIAL)
+enable(GL_NORMALIZE)
 glShadeModel(GL_SMOOTH)
 
 # Fog - lighter and farther
-glEnable(GL_FOG)
+enable(GL_FOG)
 glFogfv(GL_FOG_COLOR, C_SKY)
 glFogi(GL_FOG_MODE, GL_LINEAR)
-glFogf(GL_FOG_START, 50.0) 
-glFogf(GL_FOG_END, 150.0)   # Increased view distance
+glFogf(GL_FOG_START, config.FOG_START) 
+glFogf(GL_FOG_END, config.FOG_END)   # Increased view distance
 
 # Lighting - brighter
-glEnable(GL_LIGHT0)
+enable(GL_LIGHT0)
 glLightfv(GL_LIGHT0, GL_AMBIENT, (0.05, 0.05, 0.1, 1.0))  # Dark ambient
 glLightfv(GL_LIGHT0, GL_DIFFUSE, (0.2, 0.2, 0.3, 1.0)) # Pale Moonlight
 glLightfv(GL_LIGHT0, GL_SPECULAR, (1.0, 1.0, 1.0, 1.0))
@@ -59,82 +78,86 @@ game_initialized = False  # Track if game world is generated
 # Fonts
 font = pygame.font.SysFont('arial', 24, bold=True)
 big_font = pygame.font.SysFont('arial', 48, bold=True)
+small_font = pygame.font.SysFont('consolas', 14)
 
 # System
 clock = pygame.time.Clock()
+timestep = FixedTimestep()
+mob_motion = Interpolator() # Mob store arrays at the start of the last tick
 last_footstep_time = 0
 menu_system = None
 
 
 def init_assets():
+    # Decoded and parsed in parallel; the main loop pumps GL uploads a slice per frame
+    loader = AssetLoader()
     # Textures
-    load_texture('grass', 'grass.png')
-    load_texture('stone', 'stone.png')
-    load_texture('fur', 'fur.png')
-    load_texture('mushroom_cap', 'mushroom_cap.png')
-    load_texture('mushroom_stem', 'mushroom_stem.png')
-    load_texture('chest', 'chest.png')
-    load_texture('rock_wall', 'rock_wall.png')
-    load_texture('sword_metal', 'sword_metal.png')
-    load_texture('shadow_blob', 'shadow_blob.png')
-    load_texture('tree_bark', 'bark.jpg')
-    load_texture('tree_branch', 'branch.png')
+    loader.texture('grass', 'grass.png')
+    loader.texture('stone', 'stone.png')
+    loader.texture('fur', 'fur.png')
+    loader.texture('mushroom_cap', 'mushroom_cap.png')
+    loader.texture('mushroom_stem', 'mushroom_stem.png')
+    loader.texture('chest', 'chest.png')
+    loader.texture('rock_wall', 'rock_wall.png')
+    loader.texture('sword_metal', 'sword_metal.png')
+    loader.texture('shadow_blob', 'shadow_blob.png')
+    loader.texture('tree_bark', 'bark.jpg')
+    loader.texture('tree_branch', 'branch.png')
     
-    # UI Textures (lazy load in draw_inventory usually, but preloading is fine)
-    # Models - tree with material mapping for bark and leaves
-    display_lists['tree'] = load_obj_display_list('fir.obj', 'tree_branch', {
+    # UI Textures - one atlas, loaded when the inventory first draws
+    register_ui_atlas()
+    # Models - tree with material mapping for bark and leaves (queued after their textures)
+    loader.model('tree', 'fir.obj', 'tree_branch', {
         'Trunk_bark': 'tree_bark'
     })
-    display_lists['chest'] = load_obj_display_list('chest.obj', 'chest')
+    loader.model('chest', 'chest.obj', 'chest')
     
     # Sound
-    load_sfx('footstep', 'footstep.mp3')
-    load_sfx('sword_swing', 'sword_swing.mp3')
-    load_sfx('wolf_growl', 'wolf_growl.mp3')
-    load_sfx('spider_hiss', 'spider_hiss.mp3')
+    loader.sound('footstep', 'footstep.mp3')
+    loader.sound('sword_swing', 'sword_swing.mp3')
+    loader.sound('wolf_growl', 'wolf_growl.mp3')
+    loader.sound('spider_hiss', 'spider_hiss.mp3')
+    return loader
 
 # Entities
 player = Player()
-entities = []
-
-def generate_world():
-    global entities
-    entities = []
-    # Trees
-    for i in range(50):
-        x = random.uniform(-50, 50)
-        z = random.uniform(-50, 50)
-        if math.sqrt(x*x + z*z) < 5: continue
-        # Trees draw directly? No class yet.
-        # Let's add simple tree objects or draw loop?
-        # Refactor note: Trees should be entities or world objects.
-        # For now, store pos and draw in loop.
-        entities.append({'type':'tree', 'x':x, 'z':z, 'y':get_height(x,z)})
-        
-    # Chests
-    # Guaranteed chest right in front of spawn
-    entities.append(Chest(0, -3))  # Directly in front of player
+player_prev = (0.0, 5.0, 0.0) # Camera eye at the start of the last tick
+world = worldgen.World() # Per-kind registries, rebuilt by generate_world
+
+# Trees are instanced; static props are baked per region. Both rebuilt by generate_world
+tree_batch = InstanceBatch()
+tree_instances = np.zeros((0, 5), dtype=np.float32) # Every tree; tree_batch holds the visible ones
+static_props = StaticBatcher()
+entity_grid = SpatialGrid()
+view_frustum = Frustum() # Rebuilt from the camera every frame
+mob_lod = LODSelector(config.LOD_MOB_DISTANCES)
+tree_lod = LODSelector((config.LOD_TREE_IMPOSTOR_DISTANCE,))
+tree_levels = np.zeros(0, dtype=np.int8) # Current LOD level per tree, aligned with tree_instances
+tree_impostor = TreeImpostor()
+render_queue = RenderQueue()
+# Trees bind their own textures; the per-tree fallback is drawn back to front without depth writes
+TREE_MATERIAL = material('tree', textured=True, color=None, cull=False, alpha_ref=0.4, two_sided=True)
+TREE_SORTED_MATERIAL = material('tree_sorted', textured=True, color=None, cull=False, alpha_ref=0.4,
+                                two_sided=True, depth_write=False)
+tree_order = DepthOrder() # Back-to-front tree order for the non-instanced path, kept between frames
+
+def generate_world(scale=1, seed=None):
+    global world, tree_instances, tree_levels
+    world = worldgen.generate_world(scale, seed)
     
-    for i in range(4):
-        cx, cz = random.uniform(-40, 40), random.uniform(-40, 40)
-        entities.append(Chest(cx, cz))
-        
-    # Mobs
-    for i in range(3):
-        entities.append(Wolf(random.uniform(-30,30), random.uniform(-30,30)))
-    for i in range(3):
-        entities.append(Spider(random.uniform(-30,30), random.uniform(-30,30)))
-
-    # Props (Mushrooms and Rocks)
-    for i in range(40):
-        mx, mz = random.uniform(-50, 50), random.uniform(-50, 50)
-        entities.append(Mushroom(mx, mz))
-        
-    for i in range(15):
-        rx, rz = random.uniform(-50, 50), random.uniform(-50, 50)
-        entities.append(Rock(rx, rz))
+    # Instance data and static geometry
+    tree_instances = world.trees
+    tree_levels = np.zeros(len(tree_instances), dtype=np.int8)
+    tree_batch.set_instances(tree_instances)
+    tree_order.reset(tree_instances)
+    static_props.build(world.props)
+    
+    # Trees are instanced, props baked and mobs found through their stores: the grid holds the chests
+    entity_grid.clear()
+    for chest in world.chests:
+        entity_grid.insert(chest, chest.x, chest.z)
 
-init_assets()
+asset_loader = init_assets()
 menu_system = Menu(font, big_font)
 generate_world()
 
@@ -143,88 +166,179 @@ def draw_moon():
     # Light pos matches: [50, 100, 50, 0]
     glTranslatef(50, 100, 50)
     
-    glDisable(GL_LIGHTING)
-    glDisable(GL_FOG)
-    glDisable(GL_TEXTURE_2D)
+    disable(GL_LIGHTING)
+    disable(GL_FOG)
+    disable(GL_TEXTURE_2D)
     
     glColor3f(1.0, 1.0, 0.6) # Yellowish
     
     # Draw simple sphere
-    quad = gluNewQuadric()
-    gluSphere(quad, 8.0, 16, 16)
+    draw_sphere(8.0, 16, 16)
     
-    glEnable(GL_FOG)
-    glEnable(GL_LIGHTING)
+    enable(GL_FOG)
+    enable(GL_LIGHTING)
     glPopMatrix()
 
 def draw_scene(shadow_pass=False):
+    # Shadows can fall into view from off-screen casters, so only cull the main pass
+    frustum = None if shadow_pass else view_frustum
+    
     # World
     if not shadow_pass:
         draw_moon() # Draw before transparent items, but after clear
-        draw_ground(texture_ids)
+        draw_ground(textures, frustum)
     
-    # Collect entities by type for proper render order
-    trees = []
-    other_entities = []
+    # Entities, baked props and trees go through the queue: opaque packets grouped by material,
+    # then transparent ones back to front
+    for ent in visible_entities(frustum):
+        ent.submit(render_queue, shadow_pass)
+    static_props.submit(render_queue, shadow_pass, frustum)
+    submit_trees(render_queue, shadow_pass, frustum)
+    render_queue.flush(textures, shadow_pass)
+
+def visible_entities(frustum=None):
+    return visible_chests(frustum) + visible_mobs(frustum)
+
+def visible_chests(frustum=None):
+    if frustum is None:
+        return entity_grid.query_radius(player.pos[0], player.pos[2], config.DRAW_DISTANCE)
+    candidates = entity_grid.query_frustum(frustum.planes)
+    if not candidates: return candidates
     
-    for ent in entities:
-        if isinstance(ent, dict) and ent['type'] == 'tree':
-            trees.append(ent)
-        else:
-            other_entities.append(ent)
+    # One vectorized bounding-sphere test for every candidate
+    centers = [(e.x, e.y + e.BOUNDS[0], e.z) for e in candidates]
+    radii = [e.BOUNDS[1] for e in candidates]
+    mask = frustum.cull_spheres(centers, radii, 'entities')
+    return [e for e, v in zip(candidates, mask) if v]
+
+def visible_mobs(frustum=None):
+    # Culled and LOD-selected straight from the store arrays
+    out = []
+    for cls in (Wolf, Spider):
+        store = cls.store
+        n = store.count
+        if not n: continue
+        if frustum is None:
+            out.extend(store.views[i] for i in store.within(player.pos[0], player.pos[2], config.DRAW_DISTANCE))
+            continue
+        pos = np.stack([store.x[:n], store.y[:n], store.z[:n]], axis=1)
+        center_y, radius = cls.BOUNDS
+        rows = np.flatnonzero(frustum.cull_spheres(pos + (0, center_y, 0), radius, 'mobs'))
+        store.lod[rows] = mob_lod.select(store.lod[rows], np.linalg.norm(pos[rows] - frustum.eye, axis=1))
+        out.extend(store.views[i] for i in rows)
+    return out
+
+def draw_tree_batch(model, d, shadow_pass):
+    glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, (0,0,0,1))
+    # Only re-upload the instance buffer when the visible set or its order changed
+    if not np.array_equal(d, tree_batch.data):
+        tree_batch.set_instances(d)
+    tree_batch.draw_model(model, shadow_pass, alpha_ref=0.0 if shadow_pass else 0.4)
+
+def submit_trees(queue, shadow_pass=False, frustum=None):
+    model = display_lists.get('tree')
+    if not model or not len(tree_instances): return
+    instanced = instancing_supported()
+    if not shadow_pass and tree_impostor.ok is None: tree_impostor.bake(model)
     
-    # Draw opaque entities first (chests, mobs)
-    for ent in other_entities:
-        if hasattr(ent, 'draw'):
-            ent.draw(shadow_pass)
+    d = tree_instances
+    far = d[:0]
+    if frustum is not None:
+        # Bounding sphere of the model, scaled per instance
+        centers = d[:, 0:3] + model.center * d[:, 3:4]
+        visible = frustum.cull_spheres(centers, model.radius * d[:, 3], 'trees')
+        idx = np.nonzero(visible)[0]
+        # Distant trees switch to the billboard impostor
+        if tree_impostor.ok:
+            dist = np.linalg.norm(d[idx, 0:3] - frustum.eye, axis=1)
+            tree_levels[idx] = tree_lod.select(tree_levels[idx], dist)
+            far = d[idx[tree_levels[idx] == 1]]
+            idx = idx[tree_levels[idx] == 0]
+            visible[:] = False; visible[idx] = True
+        if not shadow_pass and not instanced:
+            # Painter's order for the fallback; the kept order is filtered, not re-sorted
+            idx = tree_order.visible(frustum.eye, visible)
+        d = d[idx]
+    if not len(d) and not len(far): return
     
-    # Draw trees with alpha - disable depth write for transparency
-    tid_tree = display_lists.get('tree')
+    # The per-tree fallback keeps painter's order and skips depth writes for transparency, so
+    # its packets are transparent, placed by their furthest tree. Instanced draws go material by
+    # material across all trees, so they write depth instead (leaves are alpha-tested and
+    # blending is off, so that is exact) and stay opaque.
+    sorted_pass = not shadow_pass and not instanced
+    mat = TREE_SORTED_MATERIAL if sorted_pass else TREE_MATERIAL
+    def furthest(rows):
+        return float(np.max(np.sum((rows[:, 0:3] - frustum.eye)**2, axis=1))) if sorted_pass else 0.0
+    # Impostors are the furthest trees, so they sort first
+    if len(far) and not shadow_pass:
+        queue.submit(mat, tree_impostor.draw, far, frustum.eye, depth=furthest(far), transparent=sorted_pass)
+    if len(d):
+        queue.submit(mat, draw_tree_batch, model, d, shadow_pass, depth=furthest(d), transparent=sorted_pass)
+
+def player_eye():
+    return (player.pos[0], player.cam_h, player.pos[2])
+
+def setup_camera(eye=None):
+    # Projection and view from the player (or an interpolated eye), frustum rebuilt to match
+    glMatrixMode(GL_PROJECTION); glLoadIdentity()
+    gluPerspective(config.FOV, WIDTH/HEIGHT, 0.1, 200.0) # Use config.FOV
+    glMatrixMode(GL_MODELVIEW); glLoadIdentity()
     
-    if not shadow_pass:
-        glEnable(GL_TEXTURE_2D)
-        glEnable(GL_ALPHA_TEST)
-        glAlphaFunc(GL_GREATER, 0.5)  # Stricter alpha test
-        glDepthMask(GL_FALSE)  # Don't write to depth buffer for transparent parts
-    else:
-        glDisable(GL_TEXTURE_2D)
+    # Camera
+    ex, cy, ez = eye or player_eye()
+    pch = math.radians(player.rot[1])
+    rad = math.radians(player.rot[0])
+    lx = ex + math.sin(rad)*math.cos(pch)
+    lz = ez - math.cos(rad)*math.cos(pch)
+    ly = cy - math.sin(pch)
+    gluLookAt(ex, cy, ez, lx, ly, lz, 0, 1, 0)
+    view_frustum.update((ex, cy, ez), (lx, ly, lz),
+                        config.FOV, WIDTH/HEIGHT, 0.1, 200.0, max_dist=config.DRAW_DISTANCE)
+
+def simulate(df):
+    """One fixed simulation tick: movement, footsteps and entity updates around the player"""
+    global last_footstep_time, player_prev
+    player_prev = player_eye()
     
-    # Sort trees by distance from camera (back to front)
-    trees_sorted = sorted(trees, key=lambda t: -(t['x']-player.pos[0])**2 - (t['z']-player.pos[2])**2)
+    keys = pygame.key.get_pressed()
+    rad = math.radians(player.rot[0])
+    s, c = math.sin(rad), math.cos(rad)
+    dx, dz = 0, 0
+    if keys[K_w]: dx+=s; dz-=c
+    if keys[K_s]: dx-=s; dz+=c
+    if keys[K_a]: dx-=c; dz-=s
+    if keys[K_d]: dx+=c; dz+=s
     
-    for ent in trees_sorted:
-        glLightModeli(GL_LIGHT_MODEL_TWO_SIDE, GL_TRUE)
-        glDisable(GL_CULL_FACE)
-        glMaterialfv(GL_FRONT_AND_BACK, GL_SPECULAR, (0,0,0,1))
-        
-        glPushMatrix()
-        glTranslatef(ent['x'], ent['y'], ent['z'])
-        glScalef(2.5, 2.5, 2.5)
-        
-        if shadow_pass:
-            glColor4f(0, 0, 0, 0.4)
-        
-        if tid_tree: 
-            glCallList(tid_tree)
-        
-        glPopMatrix()
-        
-        glEnable(GL_CULL_FACE)
-        glLightModeli(GL_LIGHT_MODEL_TWO_SIDE, GL_FALSE)
+    player.pos[0] += dx * SPEED * df
+    player.pos[2] += dz * SPEED * df
+    player.pos[1] = get_height(player.pos[0], player.pos[2]) + 2.0
     
-    if not shadow_pass:
-        glDepthMask(GL_TRUE)  # Re-enable depth writing
-        glDisable(GL_ALPHA_TEST)
+    # Sound
+    if (dx!=0 or dz!=0) and 'footstep' in sfx_sounds:
+        now = pygame.time.get_ticks()
+        if now - last_footstep_time > FOOTSTEP_COOLDOWN:
+            last_footstep_time = now
+            sfx_sounds['footstep'].play()
+    
+    player.update(df)
+    for chest in entity_grid.query_radius(player.pos[0], player.pos[2], config.UPDATE_RADIUS):
+        chest.update(df)
+    # Drawing interpolates mobs from where this tick started
+    mob_motion.snapshot(MOB_STORES)
+    update_mobs(df, player.pos[0], player.pos[2], config.UPDATE_RADIUS)
 
 # Menu button areas (will be set during drawing)
 menu_buttons = {}
 
 def start_new_game():
-    global game_state, game_initialized, paused
+    global game_state, game_initialized, paused, player_prev
     generate_world()
     player.pos = [0.0, 5.0, 0.0]
     player.rot = [0.0, 0.0]
     player.cam_h = 5.0
+    player_prev = player_eye()
+    mob_motion.clear()
+    timestep.hold()
     game_state = STATE_GAME
     game_initialized = True
     paused = False
@@ -244,21 +358,26 @@ def main():
 
     
     while running:
-        df = clock.tick(60) * 0.06
-        if df > 2.0: df = 2.0
+        with profiler.section('tick_wait'):
+            frame_ms = clock.tick(config.FPS_LIMIT)
+        ticks = timestep.advance(frame_ms / 1000.0)
+        profiler.begin_frame()
+        if not asset_loader.done: asset_loader.pump()
+        textures.begin_frame()
         
         # Events
+        input_section = profiler.start('input')
         for e in pygame.event.get():
             if e.type == QUIT: running = False
             if e.type == VIDEORESIZE:
                 WIDTH, HEIGHT = e.w, e.h
                 config.WIDTH, config.HEIGHT = WIDTH, HEIGHT # Update config globals slightly hacky
-                screen = pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL | RESIZABLE)
+                screen = pygame.display.set_mode((WIDTH, HEIGHT), DOUBLEBUF | OPENGL | RESIZABLE, vsync=int(config.VSYNC))
                 glViewport(0, 0, WIDTH, HEIGHT)
             # Global Menu Handling (Mouse clicks from menu.py)
             if game_state == STATE_MENU:
                 action = menu_system.handle_input(e)
-                if action == 'new_game':
+                if action == 'new_game' and asset_loader.done:
                     start_new_game()
                 elif action == 'save_settings':
                     # Apply Settings
@@ -285,6 +404,11 @@ def main():
                         pygame.mouse.set_visible(False)
                         pygame.event.set_grab(True)
                         pygame.mouse.get_rel()
+            
+                if e.key == K_F3:
+                    profiler.set_enabled(not profiler.enabled)
+                if e.key == K_F4 and profiler.enabled:
+                    print("Profile written: %s, %s" % profiler.export(config.PROFILE_DIR))
                 
                 if e.key == K_s and paused:
                     show_settings = not show_settings
@@ -320,7 +444,8 @@ def main():
                      target_chest = None
                      min_dist = 2.5
                      
-                     for ent in entities:
+                     # Only entities near the ray's ground projection are candidates
+                     for ent in entity_grid.query_ray(ox, oz, dx, dz, min_dist, margin=0.8):
                          if isinstance(ent, Chest):
                              dist_to_center = math.sqrt((ent.x - ox)**2 + (ent.y - oy)**2 + (ent.z - oz)**2)
                              if dist_to_center > min_dist + 1.5: continue
@@ -366,18 +491,19 @@ def main():
                     if w and w.type == 'weapon':
                         player.attacking = True
                         if 'sword_swing' in sfx_sounds: sfx_sounds['sword_swing'].play()
+        input_section.stop()
 
         # === UPDATE & DRAW ===
         
         # Clear Screen (Common)
-        glEnable(GL_DEPTH_TEST)
+        enable(GL_DEPTH_TEST)
         glClearColor(*C_SKY)
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         
         if game_state == STATE_MENU:
             # --- MENU DRAW ---
             # --- MENU DRAW ---
-            menu_system.draw_main_menu()
+            menu_system.draw_main_menu(asset_loader)
 
             
         elif game_state == STATE_GAME or game_state == STATE_INVENTORY:
@@ -387,47 +513,20 @@ def main():
                 player.rot[0] += mdx * MOUSE_SENS
                 player.rot[1] = max(-89, min(89, player.rot[1] + mdy * MOUSE_SENS))
                 
-                keys = pygame.key.get_pressed()
-                rad = math.radians(player.rot[0])
-                s, c = math.sin(rad), math.cos(rad)
-                dx, dz = 0, 0
-                if keys[K_w]: dx+=s; dz-=c
-                if keys[K_s]: dx-=s; dz+=c
-                if keys[K_a]: dx-=c; dz-=s
-                if keys[K_d]: dx+=c; dz+=s
-                
-                player.pos[0] += dx * SPEED * df
-                player.pos[2] += dz * SPEED * df
-                player.pos[1] = get_height(player.pos[0], player.pos[2]) + 2.0
-                
-                # Sound
-                if (dx!=0 or dz!=0) and 'footstep' in sfx_sounds:
-                    now = pygame.time.get_ticks()
-                    if now - last_footstep_time > FOOTSTEP_COOLDOWN:
-                        last_footstep_time = now
-                        sfx_sounds['footstep'].play()
-                
-                player.update(df)
-                for ent in entities:
-                    if not isinstance(ent, dict) and hasattr(ent, 'update'): ent.update(df)
+                with profiler.section('entity_updates'):
+                    for _ in range(ticks):
+                        simulate(timestep.df)
+                    profiler.count('sim_ticks', ticks)
+            else:
+                timestep.hold()
 
             # --- GAME DRAW ---
-            glEnable(GL_DEPTH_TEST)
-            glEnable(GL_LIGHTING)
-            glEnable(GL_FOG)
-            
-            glMatrixMode(GL_PROJECTION); glLoadIdentity()
-            gluPerspective(config.FOV, WIDTH/HEIGHT, 0.1, 200.0) # Use config.FOV
-            glMatrixMode(GL_MODELVIEW); glLoadIdentity()
+            enable(GL_DEPTH_TEST)
+            enable(GL_LIGHTING)
+            enable(GL_FOG)
             
-            # Camera
-            pch = math.radians(player.rot[1])
-            rad = math.radians(player.rot[0])
-            cy = player.cam_h
-            lx = player.pos[0] + math.sin(rad)*math.cos(pch)
-            lz = player.pos[2] - math.cos(rad)*math.cos(pch)
-            ly = cy - math.sin(pch)
-            gluLookAt(player.pos[0], cy, player.pos[2], lx, ly, lz, 0, 1, 0)
+            alpha = timestep.alpha
+            setup_camera(tuple(p + (c - p) * alpha for p, c in zip(player_prev, player_eye())))
             
             # Lights
             # Lights
@@ -435,34 +534,39 @@ def main():
             glLightfv(GL_LIGHT0, GL_POSITION, [50, 100, 50, 0])
             
             # Scene
-            draw_scene(False)
+            with profiler.section('update_ground'):
+                update_ground(player.pos[0], player.pos[2])
+            with profiler.section('draw_scene'), mob_motion.apply(alpha):
+                draw_scene(False)
             
             # UI Overlay
             glMatrixMode(GL_PROJECTION); glLoadIdentity()
             glOrtho(0, WIDTH, HEIGHT, 0, -1, 1)
             glMatrixMode(GL_MODELVIEW); glLoadIdentity()
-            glDisable(GL_DEPTH_TEST)
-            glDisable(GL_LIGHTING)
-            glDisable(GL_FOG)       # CRITICAL FIX for UI visibility
-            glDisable(GL_CULL_FACE) # CRITICAL FIX for UI visibility
+            disable(GL_DEPTH_TEST)
+            disable(GL_LIGHTING)
+            disable(GL_FOG)       # CRITICAL FIX for UI visibility
+            disable(GL_CULL_FACE) # CRITICAL FIX for UI visibility
 
             
-            if game_state == STATE_GAME:
-                if not paused: player.draw_hud()
-                # HUD elements
-                draw_rect(20, HEIGHT-40, 200, 20, (0.8, 0, 0, 1)) # Health
-                # Hotbar
-                start_x = WIDTH//2 - (9*(68))//2
-                for i in range(9):
-                    x = start_x + i*68
-                    col = (0.2,0.2,0.2,0.8)
-                    if i < 2 and player.active_slot == i+1: col = (0.4, 0.4, 0.2, 0.8)
-                    draw_rect(x, HEIGHT-75, 60, 60, col)
-                    item = player.inventory.pockets[i]
-                    if item:
-                        # Simple Item indicator
-                        icol = (0.6,0.3,0.3,1) if item.type=='weapon' else (0.3,0.6,0.3,1)
-                        draw_rect(x+5, HEIGHT-70, 50, 50, icol)
+            with profiler.section('hud'):
+                if game_state == STATE_GAME:
+                    if not paused: player.draw_hud()
+                    # HUD elements
+                    draw_rect(20, HEIGHT-40, 200, 20, (0.8, 0, 0, 1)) # Health
+                    # Hotbar
+                    start_x = WIDTH//2 - (9*(68))//2
+                    for i in range(9):
+                        x = start_x + i*68
+                        col = (0.2,0.2,0.2,0.8)
+                        if i < 2 and player.active_slot == i+1: col = (0.4, 0.4, 0.2, 0.8)
+                        draw_rect(x, HEIGHT-75, 60, 60, col)
+                        item = player.inventory.pockets[i]
+                        if item:
+                            # Simple Item indicator
+                            icol = (0.6,0.3,0.3,1) if item.type=='weapon' else (0.3,0.6,0.3,1)
+                            draw_rect(x+5, HEIGHT-70, 50, 50, icol, z=1)
+                    flush_ui()
 
             if paused:
                 menu_system.draw_pause_menu()
@@ -471,7 +575,16 @@ def main():
             if game_state == STATE_INVENTORY:
                 draw_inventory(player, font)
 
+        flush_ui() # Anything a UI layer left queued
+        if profiler.enabled:
+            menu_system.draw_profiler_overlay(profiler, small_font, [
+                f"visible         {view_frustum.summary()}",
+                f"textures        {textures.resident_bytes // (1024 * 1024)} MB, {textures.loads} loads, {textures.evictions} evicted",
+                f"gl state        {gl_state.summary()}",
+            ])
         pygame.display.flip()
+        gl_state.flush_counts()
+        profiler.end_frame()
     
     pygame.quit()
 
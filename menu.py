@@ -2,6 +2,9 @@ import pygame
 from OpenGL.GL import *
 from config import WIDTH, HEIGHT
 from utils import draw_rect, draw_ui_text
+from text import measure_text
+from ui_batch import flush_ui
+from glstate import enable, disable
 
 class Menu:
     def __init__(self, font, big_font):
@@ -22,7 +25,7 @@ class Menu:
             'sens': {'val': 0.15, 'min': 0.05, 'max': 0.5, 'step': 0.01}
         }
         
-    def draw_main_menu(self):
+    def draw_main_menu(self, loader=None):
         self._setup_view()
         
         # Background Gradient simulation
@@ -32,16 +35,26 @@ class Menu:
             self._draw_main_buttons()
         elif self.state == 'settings':
             self._draw_settings_menu()
+        if loader is not None and not loader.done:
+            self._draw_loading_bar(loader.progress, loader.current)
+        flush_ui()
+            
+    def _draw_loading_bar(self, progress, label):
+        bw, bh = 400, 8
+        bx, by = WIDTH//2 - bw//2, HEIGHT - 90
+        draw_rect(bx, by, bw, bh, self.COLOR_BTN_NORMAL)
+        draw_rect(bx, by, int(bw * progress), bh, (0.4, 0.8, 1.0, 1), z=1)
+        draw_ui_text(self.font, f"Ładowanie... {int(progress * 100)}%  {label}", bx, by - 34, (120, 120, 140))
             
     def _setup_view(self):
         glMatrixMode(GL_PROJECTION); glLoadIdentity()
         glOrtho(0, WIDTH, HEIGHT, 0, -1, 1)
         glMatrixMode(GL_MODELVIEW); glLoadIdentity()
-        glDisable(GL_DEPTH_TEST)
-        glDisable(GL_LIGHTING)
-        glDisable(GL_FOG)
-        glDisable(GL_CULL_FACE)
-        glEnable(GL_BLEND)
+        disable(GL_DEPTH_TEST)
+        disable(GL_LIGHTING)
+        disable(GL_FOG)
+        disable(GL_CULL_FACE)
+        enable(GL_BLEND)
         
     def _draw_main_buttons(self):
         # Title
@@ -75,10 +88,9 @@ class Menu:
             col = self.COLOR_BTN_HOVER if hover else self.COLOR_BTN_NORMAL
             draw_rect(bx, by, btn_w, btn_h, col)
             
-            # Text
-            # Centering hack (approximate)
-            tw = len(text) * 12 # Rough estimate
-            draw_ui_text(self.font, text, bx + btn_w//2 - tw, by + 18, self.COLOR_TEXT)
+            # Text, centered from glyph metrics
+            tw, th = measure_text(self.font, text)
+            draw_ui_text(self.font, text, bx + (btn_w - tw)//2, by + (btn_h - th)//2, self.COLOR_TEXT)
             
         # Footer
         draw_ui_text(self.font, "v1.0 Refactored", WIDTH - 180, HEIGHT - 40, (80, 80, 80))
@@ -190,6 +202,22 @@ class Menu:
         if isinstance(s['val'], float):
              s['val'] = round(s['val'], 2)
 
+    def draw_profiler_overlay(self, profiler, font, extra=()):
+        """Rolling section times and counters in the top-left corner, plus any extra lines"""
+        lines = [(f"PROFILER  {profiler.frame} frames   [F3] hide  [F4] export", self.COLOR_ACCENT)]
+        for kind, name, s in profiler.summary():
+            if kind == 'time_ms':
+                lines.append((f"{name:<16}{s['avg']:7.2f} ms  p95 {s['p95']:6.2f}  max {s['max']:6.2f}", (220, 220, 230)))
+            else:
+                lines.append((f"{name:<16}{s['avg']:7.0f}     max {s['max']:6.0f}", (160, 220, 160)))
+        lines += [(line, (200, 200, 140)) for line in extra]
+
+        line_h = font.get_height() + 2
+        draw_rect(8, 8, 460, line_h * len(lines) + 12, (0, 0, 0, 0.65), z=10)
+        for i, (text, color) in enumerate(lines):
+            draw_ui_text(font, text, 16, 14 + i * line_h, color)
+        flush_ui()
+
     def draw_pause_menu(self):
         # Overlay
         draw_rect(0, 0, WIDTH, HEIGHT, (0, 0, 0, 0.8))
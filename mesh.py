@@ -0,0 +1,263 @@
+"""
+GPU meshes - interleaved vertex buffers drawn with glDrawElements
+"""
+import os
+import json
+import ctypes
+import struct
+import numpy as np
+from OpenGL.GL import *
+from profiler import profiler
+from cache_key import source_key
+from glstate import enable, disable, bind_texture
+
+# Interleaved layout: position(3) normal(3) texcoord(2), all float32
+VERTEX_FLOATS = 8
+VERTEX_STRIDE = VERTEX_FLOATS * 4
+_OFS_NORMAL = ctypes.c_void_p(3 * 4)
+_OFS_TEXCOORD = ctypes.c_void_p(6 * 4)
+
+class GpuMesh:
+    """One vertex buffer + one index buffer. Build on any thread, upload on the GL thread."""
+    def __init__(self, vertices, indices):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, VERTEX_FLOATS)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32).ravel()
+        self.count = len(self.indices)
+        # Object-space bounding box, kept after upload for culling
+        if len(self.vertices):
+            self.lo = self.vertices[:, 0:3].min(axis=0)
+            self.hi = self.vertices[:, 0:3].max(axis=0)
+        else:
+            self.lo = self.hi = np.zeros(3, dtype=np.float32)
+        self.vbo = None
+        self.ibo = None
+
+    def upload(self):
+        self.vbo, self.ibo = (int(b) for b in glGenBuffers(2))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, self.indices.nbytes, self.indices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+        # CPU copies are no longer needed once the GPU owns the data
+        self.vertices = None
+        self.indices = None
+
+    def bind(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_NORMAL_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glVertexPointer(3, GL_FLOAT, VERTEX_STRIDE, None)
+        glNormalPointer(GL_FLOAT, VERTEX_STRIDE, _OFS_NORMAL)
+        glTexCoordPointer(2, GL_FLOAT, VERTEX_STRIDE, _OFS_TEXCOORD)
+
+    def draw_elements(self, first=0, count=None):
+        if count is None: count = self.count - first
+        profiler.count('draw_calls')
+        glDrawElements(GL_TRIANGLES, count, GL_UNSIGNED_INT, ctypes.c_void_p(first * 4))
+
+    def draw(self):
+        if not self.vbo: return
+        self.bind()
+        self.draw_elements()
+        unbind()
+
+    def delete(self):
+        if self.vbo:
+            glDeleteBuffers(2, [self.vbo, self.ibo])
+        self.vbo = self.ibo = None
+
+def unbind():
+    glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+    glDisableClientState(GL_NORMAL_ARRAY)
+    glDisableClientState(GL_VERTEX_ARRAY)
+    glBindBuffer(GL_ARRAY_BUFFER, 0)
+    glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+def _obj_index(token, count):
+    # OBJ indices are 1-based, negative values count back from the end
+    if not token: return -1
+    i = int(token)
+    return i - 1 if i > 0 else count + i
+
+def parse_obj(path):
+    """
+    Parse an OBJ file into one de-duplicated vertex array and per-material index ranges.
+    Returns (vertices (N, 8) float32, indices uint32, [(material_name, first, count), ...])
+    """
+    positions, texcoords, normals = [], [], []
+    material_corners = {}  # material_name -> flat list of v, vt, vn per triangle corner
+    corners = None
+
+    for line in open(path, "r", encoding='utf-8', errors='ignore'):
+        if line.startswith('#'): continue
+        vals = line.split()
+        if not vals: continue
+        tag = vals[0]
+        if tag == 'v': positions.append(vals[1:4])
+        elif tag == 'vt': texcoords.append(vals[1:3])
+        elif tag == 'vn': normals.append(vals[1:4])
+        elif tag == 'usemtl':
+            corners = material_corners.setdefault(vals[1] if len(vals) > 1 else 'default', [])
+        elif tag == 'f':
+            if corners is None: corners = material_corners.setdefault('default', [])
+            face = []
+            for v in vals[1:]:
+                w = v.split('/')
+                face.append((_obj_index(w[0], len(positions)),
+                             _obj_index(w[1], len(texcoords)) if len(w) > 1 else -1,
+                             _obj_index(w[2], len(normals)) if len(w) > 2 else -1))
+            # Triangle fan
+            for i in range(1, len(face) - 1):
+                corners.extend(face[0]); corners.extend(face[i]); corners.extend(face[i+1])
+
+    groups = [(name, np.array(c, dtype=np.int64).reshape(-1, 3)) for name, c in material_corners.items() if c]
+    if not groups:
+        return np.zeros((0, VERTEX_FLOATS), np.float32), np.zeros(0, np.uint32), []
+
+    pos = np.array(positions, dtype=np.float32).reshape(-1, 3)
+    uv = np.array(texcoords, dtype=np.float32).reshape(-1, 2)
+    nrm = np.array(normals, dtype=np.float32).reshape(-1, 3)
+
+    # De-duplicate (v, vt, vn) triples across all materials
+    all_corners = np.concatenate([c for _, c in groups])
+    unique, inverse = np.unique(all_corners, axis=0, return_inverse=True)
+    inverse = inverse.ravel().astype(np.uint32)
+
+    vertices = np.zeros((len(unique), VERTEX_FLOATS), dtype=np.float32)
+    vertices[:, 0:3] = pos[unique[:, 0]]
+
+    has_uv = (unique[:, 1] >= 0) & (unique[:, 1] < len(uv))
+    vertices[has_uv, 6:8] = uv[unique[has_uv, 1]]
+
+    has_n = (unique[:, 2] >= 0) & (unique[:, 2] < len(nrm))
+    vertices[has_n, 3:6] = nrm[unique[has_n, 2]]
+    if not has_n.all():
+        # No normals in the file - smooth them from the faces sharing each position
+        tri = all_corners[:, 0].reshape(-1, 3)
+        p0, p1, p2 = pos[tri[:, 0]], pos[tri[:, 1]], pos[tri[:, 2]]
+        face_n = np.cross(p1 - p0, p2 - p0)  # Area weighted
+        smooth = np.zeros_like(pos)
+        for k in range(3): np.add.at(smooth, tri[:, k], face_n)
+        length = np.linalg.norm(smooth, axis=1, keepdims=True)
+        smooth = np.where(length > 0, smooth / np.maximum(length, 1e-12), (0, 1, 0))
+        vertices[~has_n, 3:6] = smooth[unique[~has_n, 0]]
+
+    materials, first = [], 0
+    for name, c in groups:
+        materials.append((name, first, len(c)))
+        first += len(c)
+    return vertices, inverse, materials
+
+# --- Compiled mesh cache ---
+# Layout: magic | uint32 header length | JSON header | pad to 16 | vertices f32 | indices u32
+CACHE_MAGIC = b'GMESH\x00\x01\x00'
+CACHE_EXT = '.meshcache'
+
+def write_mesh_cache(cache_path, key, vertices, indices, materials):
+    header = json.dumps({
+        'source': key,
+        'vertex_count': len(vertices),
+        'index_count': len(indices),
+        'materials': materials,
+    }).encode('utf-8')
+    head = CACHE_MAGIC + struct.pack('<I', len(header)) + header
+    head += b'\x00' * (-len(head) % 16)
+
+    # Write to a temp file and swap in, so a crash never leaves half a cache behind
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(head)
+        f.write(np.ascontiguousarray(vertices, dtype='<f4').tobytes())
+        f.write(np.ascontiguousarray(indices, dtype='<u4').tobytes())
+    os.replace(tmp, cache_path)
+
+def read_mesh_cache(cache_path, key):
+    """Memory-map a compiled mesh, or return None if it is missing or stale"""
+    if not os.path.exists(cache_path): return None
+    with open(cache_path, 'rb') as f:
+        if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC: return None
+        (size,) = struct.unpack('<I', f.read(4))
+        header = json.loads(f.read(size).decode('utf-8'))
+    if header['source'] != key: return None
+
+    offset = len(CACHE_MAGIC) + 4 + size
+    offset += -offset % 16
+    vcount, icount = header['vertex_count'], header['index_count']
+    vertices = np.memmap(cache_path, dtype='<f4', mode='r', offset=offset, shape=(vcount, VERTEX_FLOATS))
+    offset += vertices.nbytes
+    indices = np.memmap(cache_path, dtype='<u4', mode='r', offset=offset, shape=(icount,))
+    materials = [tuple(m) for m in header['materials']]
+    return vertices, indices, materials
+
+def load_obj_arrays(path):
+    """parse_obj with a binary cache next to the OBJ, keyed by the source mtime and size"""
+    cache_path = path + CACHE_EXT
+    key = source_key(path)
+    try:
+        cached = read_mesh_cache(cache_path, key)
+        if cached is not None: return cached
+    except (OSError, ValueError, KeyError, struct.error) as e: # struct.error: truncated header
+        print(f"Mesh cache unreadable {cache_path}: {e}")
+
+    vertices, indices, materials = parse_obj(path)
+    try:
+        write_mesh_cache(cache_path, key, vertices, indices, materials)
+    except OSError as e:
+        print(f"Mesh cache not written {cache_path}: {e}")
+    return vertices, indices, materials
+
+class ObjModel:
+    """Multi-material model: one shared vertex buffer, one index range per material"""
+    def __init__(self, vertices, indices, materials, material_state, handles=()):
+        # material_state: material_name -> (texture_id, color)
+        # handles: texture handles keeping those ids resident, released by delete()
+        self.handles = list(handles)
+        self.groups = []
+        for name, first, count in materials:
+            tex_id, color = material_state[name]
+            self.groups.append((tex_id, color, first, count))
+        self.mesh = GpuMesh(vertices, indices)
+        # Bounding sphere for culling
+        self.center = (self.mesh.lo + self.mesh.hi) * 0.5
+        self.radius = float(np.linalg.norm(self.mesh.hi - self.mesh.lo) * 0.5)
+
+    def upload(self):
+        self.mesh.upload()
+
+    def delete(self):
+        for handle in self.handles: handle.release()
+        self.handles = []
+        self.mesh.delete()
+
+    def draw_ranges(self, shadow_pass=False):
+        # Mesh must already be bound
+        for tex_id, color, first, count in self.groups:
+            if not shadow_pass:
+                bind_texture(tex_id)
+                glColor3f(*color)
+                profiler.count('texture_binds')
+            self.mesh.draw_elements(first, count)
+
+    def draw_mesh(self, shadow_pass=False):
+        """Just the material ranges - texture, alpha test and culling come from the caller"""
+        self.mesh.bind()
+        self.draw_ranges(shadow_pass)
+        unbind()
+
+    def draw(self):
+        """Same state as the old compiled display list"""
+        enable(GL_TEXTURE_2D)
+        enable(GL_ALPHA_TEST)
+        glAlphaFunc(GL_GREATER, 0.4)
+
+        self.mesh.bind()
+        self.draw_ranges()
+        unbind()
+
+        glColor3f(1, 1, 1)  # Reset color
+        disable(GL_ALPHA_TEST)
+        disable(GL_TEXTURE_2D)
@@ -0,0 +1,120 @@
+"""
+Mob component store - positions, headings and animation phases of every mob of a type in
+contiguous NumPy arrays, updated by one vectorized kernel per type. Wolf/Spider objects are views.
+"""
+import random
+import numpy as np
+from terrain import get_height, get_heights
+
+class Column:
+    """Attribute of a mob view that reads and writes its row in the store"""
+    def __init__(self, name, cast=float):
+        self.name = name
+        self.cast = cast
+
+    def __get__(self, view, owner):
+        if view is None: return self
+        return self.cast(getattr(view.store, self.name)[view.row])
+
+    def __set__(self, view, value):
+        getattr(view.store, self.name)[view.row] = value
+
+class MobStore:
+    """
+    Rows 0..count-1 are live; arrays double in size as mobs are added and removal
+    swaps the last row into the hole. views[row] is the object for each row.
+    Each mob type's store adds update(df, rows), its kernel over an index array (every mob when rows is None).
+    """
+    FLOAT_FIELDS = ('x', 'y', 'z', 'rot', 'anim', 'speed')
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.views = []
+        for name in self.FLOAT_FIELDS:
+            setattr(self, name, np.zeros(capacity, dtype=np.float64))
+        self.lod = np.zeros(capacity, dtype=np.int8)
+        self.rng = np.random.default_rng()
+
+    @property
+    def capacity(self):
+        return len(self.x)
+
+    def _grow(self):
+        size = self.capacity * 2
+        for name in self.FLOAT_FIELDS + ('lod',):
+            old = getattr(self, name)
+            new = np.zeros(size, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, view, x, z, rot, speed=0.0):
+        if self.count == self.capacity: self._grow()
+        row = self.count
+        self.x[row], self.z[row] = x, z
+        self.y[row] = get_height(x, z)
+        self.rot[row], self.anim[row], self.speed[row], self.lod[row] = rot, 0.0, speed, 0
+        self.views.append(view)
+        self.count += 1
+        return row
+
+    def remove(self, view):
+        row, last = view.row, self.count - 1
+        if row != last:
+            for name in self.FLOAT_FIELDS + ('lod',):
+                arr = getattr(self, name)
+                arr[row] = arr[last]
+            moved = self.views[last]
+            self.views[row] = moved
+            moved.row = row
+        self.views.pop()
+        self.count -= 1
+
+    def clear(self):
+        self.count = 0
+        self.views = []
+        # Seeded from the shared random module so seeded worlds stay repeatable
+        self.rng = np.random.default_rng(random.getrandbits(32))
+
+    def within(self, x, z, radius):
+        """Rows within radius of (x, z) on the XZ plane"""
+        n = self.count
+        return np.flatnonzero((self.x[:n] - x)**2 + (self.z[:n] - z)**2 <= radius * radius)
+
+    def _rows(self, rows):
+        return slice(0, self.count) if rows is None else np.asarray(rows, dtype=np.intp)
+
+class WolfStore(MobStore):
+    def update(self, df, rows=None):
+        r = self._rows(rows)
+        self.anim[r] += 0.1 * df
+        self.rot[r] += 0.5 * df
+
+class SpiderStore(MobStore):
+    TURN_CHANCE = 0.02 # Per 60 Hz frame
+    TURN_MAX = 45.0
+
+    def update(self, df, rows=None):
+        r = self._rows(rows)
+        idx = np.arange(self.count) if rows is None else r
+        if not len(idx): return
+        self.anim[r] += 0.15 * df
+        heading = np.radians(self.rot[r])
+        step = self.speed[r] * df
+        self.x[r] += np.sin(heading) * step
+        self.z[r] += np.cos(heading) * step
+        self.y[r] = get_heights(self.x[r], self.z[r])
+
+        turning = idx[self.rng.random(len(idx)) < self.TURN_CHANCE * df]
+        self.rot[turning] += self.rng.uniform(-self.TURN_MAX, self.TURN_MAX, len(turning))
+
+wolves = WolfStore()
+spiders = SpiderStore()
+MOB_STORES = (wolves, spiders)
+
+def clear_mobs():
+    for store in MOB_STORES: store.clear()
+
+def update_mobs(df, x, z, radius):
+    """One tick for every mob within radius of (x, z)"""
+    for store in MOB_STORES:
+        if store.count: store.update(df, store.within(x, z, radius))
@@ -0,0 +1,104 @@
+"""
+Primitive mesh cache - GLU-style spheres, cylinders and disks built once as VBOs
+"""
+import math
+import numpy as np
+from OpenGL.GL import *
+from mesh import GpuMesh, VERTEX_FLOATS
+
+_arrays = {}  # (shape, params...) -> (vertices, indices), safe to build on any thread
+_meshes = {}  # (shape, params...) -> uploaded GpuMesh
+
+def _grid_indices(rows, cols):
+    # Two triangles per cell of a (rows+1) x (cols+1) vertex grid
+    idx = np.arange((rows + 1) * (cols + 1), dtype=np.uint32).reshape(rows + 1, cols + 1)
+    a = idx[:-1, :-1]; b = idx[:-1, 1:]; c = idx[1:, 1:]; d = idx[1:, :-1]
+    return np.stack([a, b, c, a, c, d], axis=-1).reshape(-1, 3)
+
+def _face_outward(verts, tris):
+    """Flip any triangle whose winding disagrees with its vertex normals (counter-clockwise = front)"""
+    p = verts[:, 0:3]; n = verts[:, 3:6]
+    face_n = np.cross(p[tris[:, 1]] - p[tris[:, 0]], p[tris[:, 2]] - p[tris[:, 0]])
+    avg_n = n[tris[:, 0]] + n[tris[:, 1]] + n[tris[:, 2]]
+    flip = np.einsum('ij,ij->i', face_n, avg_n) < 0
+    tris[flip] = tris[flip][:, [0, 2, 1]]
+    return tris.ravel()
+
+def sphere_arrays(slices, stacks):
+    """Unit sphere around the Z axis, texcoords like gluSphere with gluQuadricTexture"""
+    theta = np.linspace(0, 2 * math.pi, slices + 1)
+    phi = np.linspace(0, math.pi, stacks + 1)
+    ph, th = np.meshgrid(phi, theta, indexing='ij')
+    n = np.stack([np.sin(th) * np.sin(ph), np.cos(th) * np.sin(ph), np.cos(ph)], axis=-1)
+
+    verts = np.empty((stacks + 1, slices + 1, VERTEX_FLOATS), dtype=np.float32)
+    verts[..., 0:3] = n
+    verts[..., 3:6] = n
+    verts[..., 6] = 1.0 - th / (2 * math.pi)
+    verts[..., 7] = 1.0 - ph / math.pi
+    verts = verts.reshape(-1, VERTEX_FLOATS)
+    return verts, _face_outward(verts, _grid_indices(stacks, slices))
+
+def cylinder_arrays(base, top, height, slices, stacks):
+    """Open cylinder (or cone) along +Z from z=0 to z=height, like gluCylinder"""
+    theta = np.linspace(0, 2 * math.pi, slices + 1)
+    t = np.linspace(0, 1, stacks + 1)
+    tt, th = np.meshgrid(t, theta, indexing='ij')
+    r = base + (top - base) * tt
+    nz = (base - top) / height if height else 0.0
+
+    n = np.stack([np.sin(th), np.cos(th), np.full_like(th, nz)], axis=-1)
+    n /= np.linalg.norm(n, axis=-1, keepdims=True)
+
+    verts = np.empty((stacks + 1, slices + 1, VERTEX_FLOATS), dtype=np.float32)
+    verts[..., 0] = r * np.sin(th)
+    verts[..., 1] = r * np.cos(th)
+    verts[..., 2] = height * tt
+    verts[..., 3:6] = n
+    verts[..., 6] = 1.0 - th / (2 * math.pi)
+    verts[..., 7] = tt
+    verts = verts.reshape(-1, VERTEX_FLOATS)
+    return verts, _face_outward(verts, _grid_indices(stacks, slices))
+
+def disk_arrays(inner, outer, slices, loops):
+    """Flat annulus in the Z=0 plane facing +Z, like gluDisk"""
+    theta = np.linspace(0, 2 * math.pi, slices + 1)
+    radii = np.linspace(inner, outer, loops + 1)
+    rr, th = np.meshgrid(radii, theta, indexing='ij')
+    x, y = rr * np.sin(th), rr * np.cos(th)
+
+    verts = np.zeros((loops + 1, slices + 1, VERTEX_FLOATS), dtype=np.float32)
+    verts[..., 0] = x
+    verts[..., 1] = y
+    verts[..., 5] = 1.0
+    verts[..., 6] = 0.5 + x / (2 * outer)
+    verts[..., 7] = 0.5 + y / (2 * outer)
+    verts = verts.reshape(-1, VERTEX_FLOATS)
+    return verts, _face_outward(verts, _grid_indices(loops, slices))
+
+_BUILDERS = {'sphere': sphere_arrays, 'cylinder': cylinder_arrays, 'disk': disk_arrays}
+
+def primitive_arrays(shape, *params):
+    """Cached CPU arrays for a primitive - shared by the GPU cache and static batching"""
+    key = (shape,) + params
+    arrays = _arrays.get(key)
+    if arrays is None:
+        arrays = _arrays[key] = _BUILDERS[shape](*params)
+    return arrays
+
+def primitive_mesh(shape, *params):
+    key = (shape,) + params
+    mesh = _meshes.get(key)
+    if mesh is None:
+        vertices, indices = primitive_arrays(shape, *params)
+        mesh = _meshes[key] = GpuMesh(vertices, indices)
+        mesh.upload()
+    return mesh
+
+# Drop-in replacement for gluSphere
+
+def draw_sphere(radius, slices, stacks):
+    glPushMatrix()
+    glScalef(radius, radius, radius)
+    primitive_mesh('sphere', slices, stacks).draw()
+    glPopMatrix()
@@ -0,0 +1,160 @@
+"""
+Frame profiler - named sections and counters, rolling per-frame stats, CSV / Chrome-trace export
+(drawn by Menu.draw_profiler_overlay)
+"""
+import os
+import csv
+import json
+import time
+import threading
+import functools
+from collections import deque
+from config import PROFILER_ENABLED, PROFILER_WINDOW, PROFILER_MAX_EVENTS
+
+class _NullSection:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def stop(self): pass
+
+_NULL = _NullSection()
+
+class _Section:
+    __slots__ = ('profiler', 'name', 'start')
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def stop(self):
+        self.profiler._add(self.name, self.start, time.perf_counter())
+
+class Profiler:
+    """
+    with profiler.section('draw_scene'): ...      @profiler.profiled('draw_ground')
+    profiler.count('draw_calls')
+    While disabled, section() hands back a shared no-op and count() returns at once.
+    """
+    def __init__(self, enabled=PROFILER_ENABLED, window=PROFILER_WINDOW, max_events=PROFILER_MAX_EVENTS):
+        self.enabled = enabled
+        self.window = window
+        self.frame = 0
+        self._frame_times = {}  # section -> ms this frame
+        self._frame_counts = {} # counter -> count this frame
+        self.times = {}         # section -> deque of per-frame ms
+        self.counts = {}        # counter -> deque of per-frame counts
+        self.events = deque(maxlen=max_events) # (name, start s, duration s, thread id) for traces
+        self._frame_start = None
+        self._origin = time.perf_counter()
+
+    def set_enabled(self, on):
+        # Partial frames from around the toggle are dropped
+        self.enabled = on
+        self._frame_start = None
+        self._frame_times.clear()
+        self._frame_counts.clear()
+
+    def section(self, name):
+        return _Section(self, name) if self.enabled else _NULL
+
+    def start(self, name):
+        """Explicit form of section() for code that can't be wrapped in a with block: start(name) ... .stop()"""
+        return self.section(name).__enter__()
+
+    def profiled(self, name=None):
+        """Decorator form of section(); the flag is checked per call"""
+        def wrap(fn):
+            label = name or fn.__name__
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                if not self.enabled: return fn(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self._add(label, start, time.perf_counter())
+            return inner
+        return wrap
+
+    def count(self, name, n=1):
+        if not self.enabled: return
+        self._frame_counts[name] = self._frame_counts.get(name, 0) + n
+
+    def _add(self, name, start, end):
+        self._frame_times[name] = self._frame_times.get(name, 0.0) + (end - start) * 1000.0
+        self.events.append((name, start - self._origin, end - start, threading.get_ident()))
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter() if self.enabled else None
+
+    def end_frame(self):
+        """Push this frame's totals into the rolling windows"""
+        if not self.enabled: return
+        if self._frame_start is not None:
+            self._add('frame', self._frame_start, time.perf_counter())
+            self._frame_start = None
+        self.frame += 1
+        for store, current in ((self.times, self._frame_times), (self.counts, self._frame_counts)):
+            for name in set(store) | set(current):
+                store.setdefault(name, deque(maxlen=self.window)).append(current.get(name, 0))
+            current.clear()
+
+    # --- Reporting ---
+
+    @staticmethod
+    def _stats(values):
+        ordered = sorted(values)
+        return {
+            'avg': sum(ordered) / len(ordered),
+            'min': ordered[0],
+            'max': ordered[-1],
+            'p95': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        }
+
+    def summary(self):
+        """[(kind, name, stats)] over the rolling window, slowest sections first"""
+        rows = [('time_ms', n, self._stats(v)) for n, v in self.times.items() if v]
+        rows.sort(key=lambda r: -r[2]['avg'])
+        rows += [('count', n, self._stats(v)) for n, v in sorted(self.counts.items()) if v]
+        return rows
+
+    def export_csv(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['kind', 'name', 'avg', 'min', 'max', 'p95', 'frames'])
+            for kind, name, s in self.summary():
+                frames = len(self.times.get(name) or self.counts.get(name) or ())
+                writer.writerow([kind, name, f"{s['avg']:.4f}", f"{s['min']:.4f}", f"{s['max']:.4f}", f"{s['p95']:.4f}", frames])
+        return path
+
+    def export_chrome_trace(self, path):
+        """Complete ('X') events, loadable in chrome://tracing or Perfetto"""
+        pid = os.getpid()
+        events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': dur * 1e6, 'pid': pid, 'tid': tid}
+                  for name, start, dur, tid in list(self.events)]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def export(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return (self.export_csv(os.path.join(directory, f'profile_{stamp}.csv')),
+                self.export_chrome_trace(os.path.join(directory, f'profile_{stamp}.json')))
+
+    def reset(self):
+        self.times.clear(); self.counts.clear(); self.events.clear()
+        self._frame_times.clear(); self._frame_counts.clear()
+        self.frame = 0
+
+profiler = Profiler()
+section = profiler.section
+profiled = profiler.profiled
+count = profiler.count
@@ -0,0 +1,103 @@
+"""
+Render queue - the 3D scene submits draw packets, opaque ones are drawn grouped by material
+and transparent ones back to front, so state changes follow materials rather than objects
+"""
+import numpy as np
+from OpenGL.GL import *
+from glstate import enable, disable, bind_texture
+from profiler import profiler
+
+class Material:
+    """
+    Fixed-function state a packet is drawn with. texture is a texture manager key, or None when
+    the mesh binds its own (OBJ models, the tree impostor); color None leaves glColor to the mesh.
+    alpha_ref enables the alpha test at that reference.
+    """
+    __slots__ = ('name', 'order', 'textured', 'texture', 'color', 'lighting', 'cull',
+                 'alpha_ref', 'depth_write', 'two_sided')
+
+    def __init__(self, name, order, textured=False, texture=None, color=(1.0, 1.0, 1.0), lighting=True,
+                 cull=True, alpha_ref=None, depth_write=True, two_sided=False):
+        self.name, self.order = name, order
+        self.textured = textured or texture is not None
+        self.texture, self.color = texture, color
+        self.lighting, self.cull = lighting, cull
+        self.alpha_ref, self.depth_write, self.two_sided = alpha_ref, depth_write, two_sided
+
+    def apply(self, textures, prev=None):
+        """Switch from prev (None = unknown) to this material; enables and binds go through the GL state cache"""
+        if self.textured:
+            enable(GL_TEXTURE_2D)
+            if self.texture is not None:
+                bind_texture(textures.id(self.texture))
+                profiler.count('texture_binds')
+        else:
+            disable(GL_TEXTURE_2D)
+        if self.color is not None:
+            if len(self.color) == 4: glColor4f(*self.color)
+            else: glColor3f(*self.color)
+        if self.lighting: enable(GL_LIGHTING)
+        else: disable(GL_LIGHTING)
+        if self.cull: enable(GL_CULL_FACE)
+        else: disable(GL_CULL_FACE)
+        if self.alpha_ref is None: disable(GL_ALPHA_TEST)
+        else:
+            enable(GL_ALPHA_TEST)
+            if prev is None or prev.alpha_ref != self.alpha_ref: glAlphaFunc(GL_GREATER, self.alpha_ref)
+        if prev is None or prev.depth_write != self.depth_write:
+            glDepthMask(GL_TRUE if self.depth_write else GL_FALSE)
+        if prev is None or prev.two_sided != self.two_sided:
+            glLightModeli(GL_LIGHT_MODEL_TWO_SIDE, GL_TRUE if self.two_sided else GL_FALSE)
+
+MATERIALS = {}
+
+def material(name, **state):
+    """The material registered as name, created from state on first use"""
+    m = MATERIALS.get(name)
+    if m is None:
+        m = MATERIALS[name] = Material(name, len(MATERIALS), **state)
+    return m
+
+# What a flush leaves behind: untextured, lit, culled, depth writes on
+BASE = material('base')
+# Projected shadows - every packet of a shadow pass is drawn flat and translucent
+SHADOW = material('shadow', color=(0.0, 0.0, 0.0, 0.4), lighting=False, cull=False)
+
+class RenderQueue:
+    """
+    queue.submit(material('fur', texture='fur'), wolf.draw) ... queue.flush(textures)
+    A packet is (material, draw callable, args, model matrix or None, depth). Opaque packets are
+    stably sorted by material, so submission order is kept within one; transparent packets
+    (depth = squared distance to the eye) go after them, furthest first.
+    """
+    def __init__(self):
+        self.opaque = []
+        self.transparent = []
+
+    def submit(self, mat, draw, *args, matrix=None, depth=0.0, transparent=False):
+        (self.transparent if transparent else self.opaque).append((mat, draw, args, matrix, depth))
+
+    def flush(self, textures, shadow_pass=False):
+        self.opaque.sort(key=lambda p: p[0].order)
+        self.transparent.sort(key=lambda p: -p[4])
+        current = None
+        for mat, draw, args, matrix, depth in self.opaque + self.transparent:
+            if shadow_pass: mat = SHADOW
+            if mat is not current:
+                mat.apply(textures, current)
+                current = mat
+                profiler.count('material_switches')
+            if matrix is None:
+                draw(*args)
+            else:
+                glPushMatrix()
+                glMultMatrixf(matrix.T.astype(np.float32).ravel())
+                draw(*args)
+                glPopMatrix()
+        profiler.count('render_packets', len(self.opaque) + len(self.transparent))
+        if current is not None: BASE.apply(textures, current)
+        self.clear()
+
+    def clear(self):
+        self.opaque.clear()
+        self.transparent.clear()
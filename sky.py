@@ -4,6 +4,7 @@ Sky rendering module - Moon, stars, and night atmosphere
 import math
 from OpenGL.GL import *
 from OpenGL.GLU import *
+from glstate import enable, disable
 
 # Moon configuration
 MOON_DIRECTION = (0.5, 0.8, 0.3)  # Normalized direction TO the moon
@@ -29,7 +30,7 @@ def get_moon_light_position():
 
 def setup_moonlight():
     """Configure GL_LIGHT0 as moonlight"""
-    glEnable(GL_LIGHT0)
+    enable(GL_LIGHT0)
     
     # Directional light from moon
     glLightfv(GL_LIGHT0, GL_POSITION, get_moon_light_position())
@@ -64,9 +65,9 @@ def draw_moon(camera_pos):
                 modelview[i][j] = 0.0
     
     # Disable lighting for emissive moon
-    glDisable(GL_LIGHTING)
-    glDisable(GL_FOG)
-    glEnable(GL_BLEND)
+    disable(GL_LIGHTING)
+    disable(GL_FOG)
+    enable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA, GL_ONE)  # Additive for glow
     
     # Draw glow halo (larger, transparent)
@@ -80,9 +81,9 @@ def draw_moon(camera_pos):
     gluDisk(quad, 0, MOON_SIZE, 32, 1)
     
     # Restore state
-    glDisable(GL_BLEND)
-    glEnable(GL_FOG)
-    glEnable(GL_LIGHTING)
+    disable(GL_BLEND)
+    enable(GL_FOG)
+    enable(GL_LIGHTING)
     
     glPopMatrix()
 
@@ -91,9 +92,9 @@ def draw_stars(camera_pos, seed=42):
     import random
     random.seed(seed)
     
-    glDisable(GL_LIGHTING)
-    glDisable(GL_FOG)
-    glDisable(GL_DEPTH_TEST)
+    disable(GL_LIGHTING)
+    disable(GL_FOG)
+    disable(GL_DEPTH_TEST)
     
     glPointSize(2.0)
     glBegin(GL_POINTS)
@@ -114,9 +115,9 @@ def draw_stars(camera_pos, seed=42):
     
     glEnd()
     
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_FOG)
-    glEnable(GL_LIGHTING)
+    enable(GL_DEPTH_TEST)
+    enable(GL_FOG)
+    enable(GL_LIGHTING)
 
 def get_night_fog_color():
     """Returns fog color matching night sky"""
@@ -0,0 +1,118 @@
+"""
+Uniform-grid spatial hash on the XZ plane - radius, ray and frustum queries
+"""
+import math
+import numpy as np
+from config import SPATIAL_CELL_SIZE
+
+class SpatialGrid:
+    """
+    Entities are registered with an explicit position: insert(ent, x, z).
+    Only static entities live here; mobs are updated and drawn from their stores in mobs.py.
+    """
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = float(cell_size)
+        self.cells = {}    # (cx, cz) -> {id(ent): [ent, x, z]}
+        self._where = {}   # id(ent) -> (cx, cz)
+
+    def __len__(self):
+        return len(self._where)
+
+    def cell_of(self, x, z):
+        return (int(math.floor(x / self.cell_size)), int(math.floor(z / self.cell_size)))
+
+    def clear(self):
+        self.cells.clear()
+        self._where.clear()
+
+    def insert(self, ent, x, z):
+        key = self.cell_of(x, z)
+        self.cells.setdefault(key, {})[id(ent)] = [ent, x, z]
+        self._where[id(ent)] = key
+
+    def remove(self, ent):
+        key = self._where.pop(id(ent), None)
+        if key is None: return
+        cell = self.cells[key]
+        del cell[id(ent)]
+        if not cell: del self.cells[key]
+
+    def query_radius(self, x, z, radius):
+        """Entities within `radius` of (x, z) on the XZ plane"""
+        r2 = radius * radius
+        cx0, cz0 = self.cell_of(x - radius, z - radius)
+        cx1, cz1 = self.cell_of(x + radius, z + radius)
+        out = []
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cz in range(cz0, cz1 + 1):
+                cell = cells.get((cx, cz))
+                if not cell: continue
+                for ent, ex, ez in cell.values():
+                    if (ex - x)**2 + (ez - z)**2 <= r2:
+                        out.append(ent)
+        return out
+
+    def query_ray(self, x, z, dx, dz, max_dist, margin=1.0):
+        """
+        Entities whose position lies within `margin` of the ray segment (XZ plane),
+        sorted by distance along the ray. (dx, dz) need not be normalized.
+        """
+        length = math.hypot(dx, dz)
+        if length < 1e-9:
+            return self.query_radius(x, z, margin)
+        dx /= length; dz /= length
+        reach = max_dist * length  # max_dist is measured along the (possibly tilted) 3D ray
+
+        # Walk the segment in half-cell steps, collecting cells around it
+        pad = int(math.ceil(margin / self.cell_size))
+        keys = set()
+        steps = int(reach / (self.cell_size * 0.5)) + 1
+        for i in range(steps + 1):
+            t = min(i * self.cell_size * 0.5, reach)
+            cx, cz = self.cell_of(x + dx*t, z + dz*t)
+            for ox in range(-pad, pad + 1):
+                for oz in range(-pad, pad + 1):
+                    keys.add((cx + ox, cz + oz))
+
+        hits = []
+        for key in keys:
+            cell = self.cells.get(key)
+            if not cell: continue
+            for ent, ex, ez in cell.values():
+                vx, vz = ex - x, ez - z
+                t = vx*dx + vz*dz
+                if t < -margin or t > reach + margin: continue
+                if abs(vx*dz - vz*dx) <= margin:
+                    hits.append((t, ent))
+        hits.sort(key=lambda h: h[0])
+        return [ent for _, ent in hits]
+
+    def query_frustum(self, planes, y_min=-20.0, y_max=60.0, pad=2.0):
+        """
+        Entities in cells whose bounding box touches the frustum.
+        planes: (6, 4) array of a, b, c, d with normals pointing inwards.
+        Boxes grow by `pad` so objects overhanging their cell are kept.
+        Conservative - callers do the exact per-entity test.
+        """
+        if not self.cells: return []
+        keys = list(self.cells.keys())
+        k = np.array(keys, dtype=np.float64)
+        lo = np.empty((len(keys), 3)); hi = np.empty((len(keys), 3))
+        lo[:, 0] = k[:, 0] * self.cell_size; hi[:, 0] = lo[:, 0] + self.cell_size
+        lo[:, 2] = k[:, 1] * self.cell_size; hi[:, 2] = lo[:, 2] + self.cell_size
+        lo[:, 1] = y_min; hi[:, 1] = y_max
+        lo -= pad; hi += pad
+
+        planes = np.asarray(planes, dtype=np.float64)
+        normals = planes[:, 0:3]
+        # For each plane pick the box corner furthest along its normal (p-vertex)
+        pv = np.where(normals[None, :, :] >= 0, hi[:, None, :], lo[:, None, :])
+        dist = np.einsum('cpj,pj->cp', pv, normals) + planes[:, 3]
+        inside = (dist >= 0).all(axis=1)
+
+        out = []
+        for key, ok in zip(keys, inside):
+            if ok:
+                out.extend(entry[0] for entry in self.cells[key].values())
+        return out
@@ -0,0 +1,92 @@
+"""
+Static geometry baking - props merged into one vertex buffer per (region, material)
+"""
+import math
+import numpy as np
+from OpenGL.GL import *
+from config import STATIC_REGION_SIZE
+from mesh import GpuMesh, VERTEX_FLOATS
+from primitives import primitive_arrays
+from render_queue import material
+
+# --- 4x4 transform helpers (row-major, column vectors - same order as the glTranslate/glRotate calls) ---
+
+def translate(x, y, z):
+    m = np.eye(4); m[0:3, 3] = (x, y, z)
+    return m
+
+def scale(sx, sy=None, sz=None):
+    if sy is None: sy = sz = sx
+    return np.diag((sx, sy, sz, 1.0))
+
+def rotate_x(deg):
+    a = math.radians(deg); c, s = math.cos(a), math.sin(a)
+    m = np.eye(4); m[1, 1] = c; m[1, 2] = -s; m[2, 1] = s; m[2, 2] = c
+    return m
+
+def rotate_y(deg):
+    a = math.radians(deg); c, s = math.cos(a), math.sin(a)
+    m = np.eye(4); m[0, 0] = c; m[0, 2] = s; m[2, 0] = -s; m[2, 2] = c
+    return m
+
+def transform_vertices(vertices, matrix):
+    """Apply a model matrix to an interleaved vertex array (positions and normals)"""
+    out = np.array(vertices, dtype=np.float32, copy=True)
+    out[:, 0:3] = vertices[:, 0:3] @ matrix[0:3, 0:3].T + matrix[0:3, 3]
+    n = vertices[:, 3:6] @ np.linalg.inv(matrix[0:3, 0:3])  # Inverse-transpose, applied on the right
+    length = np.linalg.norm(n, axis=1, keepdims=True)
+    out[:, 3:6] = n / np.maximum(length, 1e-12)
+    return out
+
+def _draw_mesh(mesh):
+    if mesh.vbo is None: mesh.upload()
+    mesh.draw()
+
+class StaticBatcher:
+    """
+    Props provide static_parts(): [(texture_key, color, (shape, params...), model_matrix), ...].
+    build() merges every part sharing a material inside a region into one mesh.
+    """
+    def __init__(self, region_size=STATIC_REGION_SIZE):
+        self.region_size = region_size
+        self.groups = {}  # (texture_key, color) -> {region: GpuMesh}
+
+    def region_of(self, x, z):
+        return (int(math.floor(x / self.region_size)), int(math.floor(z / self.region_size)))
+
+    def build(self, props):
+        self.clear()
+        pending = {}  # (material, region) -> ([vertex arrays], [index arrays], vertex count)
+        for prop in props:
+            region = self.region_of(prop.x, prop.z)
+            for tex_key, color, prim, matrix in prop.static_parts():
+                verts, indices = primitive_arrays(*prim)
+                entry = pending.setdefault(((tex_key, color), region), ([], [], [0]))
+                entry[0].append(transform_vertices(verts, matrix))
+                entry[1].append(indices + entry[2][0])
+                entry[2][0] += len(verts)
+
+        for (material, region), (verts, indices, _) in pending.items():
+            mesh = GpuMesh(np.concatenate(verts), np.concatenate(indices))
+            self.groups.setdefault(material, {})[region] = mesh
+
+    def submit(self, queue, shadow_pass=False, frustum=None):
+        """One packet per visible region mesh, under the material of its group"""
+        if not self.groups: return
+        hidden = set()
+        if frustum is not None:
+            meshes = [m for regions in self.groups.values() for m in regions.values()]
+            visible = frustum.cull_boxes([m.lo for m in meshes], [m.hi for m in meshes], 'props')
+            hidden = set(id(m) for m, v in zip(meshes, visible) if not v)
+
+        for (tex_key, color), regions in self.groups.items():
+            mat = material(('prop', tex_key, color), texture=tex_key, color=color)
+            for mesh in regions.values():
+                if id(mesh) in hidden: continue
+                queue.submit(mat, _draw_mesh, mesh)
+
+    def clear(self):
+        for regions in self.groups.values():
+            for mesh in regions.values():
+                mesh.delete()
+        self.groups = {}
@@ -0,0 +1,66 @@
+"""
+Terrain height field - precomputed NumPy grid with bilinear sampling for batches,
+the exact formula for single points
+"""
+import math
+import numpy as np
+from config import TERRAIN_EXTENT, TERRAIN_RES
+
+# Flatten radius around spawn (0,0)
+SPAWN_FLAT_RADIUS = 8.0
+
+def height_formula(xs, zs):
+    """Procedural terrain evaluated on whole arrays (exact, no grid)"""
+    xs = np.asarray(xs, dtype=np.float64)
+    zs = np.asarray(zs, dtype=np.float64)
+    val = np.sin(xs * 0.1) * 1.5 + np.cos(zs * 0.1) * 1.5
+    val += np.sin(xs*0.3 + zs*0.2) * 0.5
+    dist = np.sqrt(xs*xs + zs*zs)
+    # Flatten near spawn (0,0)
+    return np.where(dist < SPAWN_FLAT_RADIUS, val * (dist / SPAWN_FLAT_RADIUS), val)
+
+class HeightField:
+    """Height grid covering [-extent, extent] on both axes, sampled every `res` units"""
+    def __init__(self, extent=TERRAIN_EXTENT, res=TERRAIN_RES):
+        self.extent = float(extent)
+        self.res = float(res)
+        self.origin = -self.extent
+        self.n = int(round(2 * self.extent / self.res)) + 1
+
+        axis = self.origin + np.arange(self.n) * self.res
+        gx, gz = np.meshgrid(axis, axis, indexing='ij')
+        self.grid = height_formula(gx, gz)  # grid[ix, iz]
+
+    def get_heights(self, xs, zs):
+        xs = np.asarray(xs, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        fx = (xs - self.origin) / self.res
+        fz = (zs - self.origin) / self.res
+        inside = (fx >= 0) & (fz >= 0) & (fx < self.n - 1) & (fz < self.n - 1)
+
+        ix = np.clip(np.floor(fx).astype(np.intp), 0, self.n - 2)
+        iz = np.clip(np.floor(fz).astype(np.intp), 0, self.n - 2)
+        tx = fx - ix; tz = fz - iz
+        g = self.grid
+        h0 = g[ix, iz] + (g[ix, iz + 1] - g[ix, iz]) * tz
+        h1 = g[ix + 1, iz] + (g[ix + 1, iz + 1] - g[ix + 1, iz]) * tz
+        out = h0 + (h1 - h0) * tx
+
+        if not inside.all():
+            out = np.where(inside, out, height_formula(xs, zs))
+        return out
+
+def get_height(x, z):
+    """Exact height at one point - cheaper than any grid lookup for a single call"""
+    val = math.sin(x * 0.1) * 1.5 + math.cos(z * 0.1) * 1.5
+    val += math.sin(x*0.3 + z*0.2) * 0.5
+    dist = math.sqrt(x*x + z*z)
+    if dist < SPAWN_FLAT_RADIUS: val *= (dist / SPAWN_FLAT_RADIUS)
+    return val
+
+# Shared field, built on import (cheap - a single vectorized pass)
+height_field = HeightField()
+
+def get_heights(xs, zs):
+    """Batched height lookup, returns an array shaped like xs"""
+    return height_field.get_heights(xs, zs)
@@ -0,0 +1,176 @@
+"""
+Text rendering - glyphs rasterized once into a shared atlas, strings batched into one draw per flush
+"""
+import ctypes
+from collections import OrderedDict
+import numpy as np
+import pygame
+from OpenGL.GL import *
+from config import TEXT_CACHE_SIZE
+from profiler import profiler
+from glstate import enable, disable, bind_texture
+
+ATLAS_SIZE = 1024
+GLYPH_PAD = 1
+
+# Interleaved text vertex: position(2) texcoord(2) color(4), all float32
+TEXT_FLOATS = 8
+TEXT_STRIDE = TEXT_FLOATS * 4
+_OFS_TEXCOORD = ctypes.c_void_p(2 * 4)
+_OFS_COLOR = ctypes.c_void_p(4 * 4)
+
+_sizes = {} # (font, char) -> (w, h), needs no GL context
+
+def glyph_size(font, ch):
+    size = _sizes.get((font, ch))
+    if size is None:
+        size = _sizes[(font, ch)] = font.size(ch)
+    return size
+
+def measure_text(font, text):
+    """Width and height of a string as draw_text lays it out"""
+    return sum(glyph_size(font, ch)[0] for ch in text), font.get_height()
+
+class AtlasFull(Exception):
+    pass
+
+class GlyphAtlas:
+    """One RGBA texture, shelf-packed with white glyphs - the color comes from the vertices"""
+    def __init__(self, size=ATLAS_SIZE):
+        self.size = size
+        self.texture = 0
+        self.glyphs = {} # (font, char) -> (u0, v0, u1, v1, w, h)
+        self._x = self._y = self._row_h = 0
+
+    def _create(self):
+        self.texture = glGenTextures(1)
+        bind_texture(self.texture)
+        # Quads are pixel-aligned, so nearest sampling keeps glyphs crisp
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        blank = np.zeros((self.size, self.size, 4), dtype=np.uint8)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, self.size, self.size, 0, GL_RGBA, GL_UNSIGNED_BYTE, blank)
+
+    def glyph(self, font, ch):
+        key = (font, ch)
+        g = self.glyphs.get(key)
+        if g is not None: return g
+        if not self.texture: self._create()
+
+        surf = font.render(ch, True, (255, 255, 255))
+        w, h = surf.get_size()
+        if self._x + w > self.size:
+            self._x = 0
+            self._y += self._row_h + GLYPH_PAD
+            self._row_h = 0
+        if self._y + h > self.size: raise AtlasFull()
+
+        data = pygame.image.tostring(surf, "RGBA", False)
+        bind_texture(self.texture)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, self._x, self._y, w, h, GL_RGBA, GL_UNSIGNED_BYTE, data)
+
+        s = float(self.size)
+        g = (self._x / s, self._y / s, (self._x + w) / s, (self._y + h) / s, w, h)
+        self.glyphs[key] = g
+        self._x += w + GLYPH_PAD
+        self._row_h = max(self._row_h, h)
+        return g
+
+    def clear(self):
+        """Forget every glyph; the texture is reused and refilled on demand"""
+        self.glyphs.clear()
+        self._x = self._y = self._row_h = 0
+
+class TextRenderer:
+    """
+    draw_text() only queues vertices. flush() draws everything queued in one call -
+    call it at the end of each UI layer so later panels still cover earlier text.
+    Laid-out strings are kept per (font, text, color), least recently used dropped first.
+    """
+    def __init__(self, cache_size=TEXT_CACHE_SIZE):
+        self.atlas = GlyphAtlas()
+        self.vbo = None
+        self._pending = []
+        self.cache_size = cache_size
+        self.strings = OrderedDict() # (font, text, color) -> vertices at the origin
+        self.hits = self.misses = 0
+
+    def layout(self, font, text):
+        """Quads for a string at the origin: (len(text) * 4, 4) rows of x, y, u, v"""
+        quads = np.empty((len(text), 4, 4), dtype=np.float32)
+        pen = 0
+        for i, ch in enumerate(text):
+            u0, v0, u1, v1, w, h = self.atlas.glyph(font, ch)
+            quads[i] = ((pen, 0, u0, v0), (pen + w, 0, u1, v0), (pen + w, h, u1, v1), (pen, h, u0, v1))
+            pen += w
+        return quads.reshape(-1, 4)
+
+    def string(self, font, text, color):
+        """Vertices for a string at the origin, from the cache when possible"""
+        key = (font, text, tuple(color))
+        verts = self.strings.get(key)
+        if verts is not None:
+            self.strings.move_to_end(key)
+            self.hits += 1
+            return verts
+        self.misses += 1
+
+        try:
+            quads = self.layout(font, text)
+        except AtlasFull:
+            # Draw what already refers to the old glyphs, then start the atlas over
+            self.flush()
+            self.atlas.clear()
+            self.strings.clear()
+            quads = self.layout(font, text)
+
+        verts = np.empty((len(quads), TEXT_FLOATS), dtype=np.float32)
+        verts[:, 0:4] = quads
+        verts[:, 4:7] = np.asarray(color[:3], dtype=np.float32) / 255.0
+        verts[:, 7] = color[3] / 255.0 if len(color) > 3 else 1.0
+
+        self.strings[key] = verts
+        while len(self.strings) > self.cache_size:
+            self.strings.popitem(last=False)
+        return verts
+
+    def draw_text(self, font, text, x, y, color=(255, 255, 255)):
+        if not text: return
+        verts = self.string(font, text, color).copy()
+        verts[:, 0] += x
+        verts[:, 1] += y
+        self._pending.append(verts)
+
+    def flush(self):
+        if not self._pending: return
+        verts = np.concatenate(self._pending)
+        self._pending = []
+
+        if self.vbo is None: self.vbo = int(glGenBuffers(1))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, GL_STREAM_DRAW)
+
+        enable(GL_TEXTURE_2D)
+        bind_texture(self.atlas.texture)
+        enable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, TEXT_STRIDE, None)
+        glTexCoordPointer(2, GL_FLOAT, TEXT_STRIDE, _OFS_TEXCOORD)
+        glColorPointer(4, GL_FLOAT, TEXT_STRIDE, _OFS_COLOR)
+        glDrawArrays(GL_QUADS, 0, len(verts))
+        profiler.count('draw_calls')
+        profiler.count('texture_binds')
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        disable(GL_TEXTURE_2D)
+        glColor4f(1, 1, 1, 1)
+
+text_renderer = TextRenderer()
+draw_text = text_renderer.draw_text
+flush_text = text_renderer.flush
@@ -0,0 +1,166 @@
+"""
+Texture cache - mip chains built once, stored next to the source (driver-compressed when the
+GL supports S3TC) and memory-mapped on later launches
+"""
+import os
+import json
+import struct
+import numpy as np
+import pygame
+from OpenGL.GL import *
+# PyOpenGL's glGetCompressedTexImage wrapper always reads level 0 and sizes it through a missing helper
+from OpenGL.raw.GL.VERSION.GL_1_3 import glGetCompressedTexImage as _get_compressed_image
+from config import TEX_DIR, TEXTURE_QUALITY, TEXTURE_COMPRESSION
+from cache_key import source_key
+from glstate import bind_texture
+try:
+    from OpenGL.GL.EXT.texture_compression_s3tc import (glInitTextureCompressionS3TcEXT,
+        GL_COMPRESSED_RGB_S3TC_DXT1_EXT, GL_COMPRESSED_RGBA_S3TC_DXT5_EXT)
+except ImportError:
+    glInitTextureCompressionS3TcEXT = None
+
+# Layout: magic | uint32 header length | JSON header | pad to 16 | mip levels, largest first
+TEXCACHE_MAGIC = b'GTEX\x00\x01\x00\x00'
+TEXCACHE_EXT = '.texcache'
+FORMAT_RGBA8 = 'rgba8'
+
+class TextureData:
+    """
+    Mip levels of one texture as [(w, h, uint8 array)], largest first.
+    format is 'rgba8' or the GL enum of a compressed format.
+    """
+    def __init__(self, path, key, levels, fmt=FORMAT_RGBA8, has_alpha=True, cached=False):
+        self.path = path
+        self.key = key
+        self.levels = levels
+        self.format = fmt
+        self.has_alpha = has_alpha
+        self.cached = cached
+
+    @property
+    def nbytes(self):
+        return sum(data.nbytes for _, _, data in self.levels)
+
+def build_mip_chain(rgba, skip=0):
+    """Box-filtered levels down to 1x1. The first `skip` levels are dropped (quality setting)."""
+    levels = [rgba]
+    img = rgba
+    while img.shape[0] > 1 or img.shape[1] > 1:
+        h, w = img.shape[:2]
+        # Odd sides (including 1) repeat their last row/column so every level halves cleanly
+        img = np.pad(img, ((0, h % 2), (0, w % 2), (0, 0)), mode='edge').astype(np.uint16)
+        img = ((img[0::2, 0::2] + img[1::2, 0::2] + img[0::2, 1::2] + img[1::2, 1::2] + 2) // 4).astype(np.uint8)
+        levels.append(img)
+    return levels[min(skip, len(levels) - 1):]
+
+def write_texture_cache(tex):
+    header = json.dumps({
+        'source': tex.key,
+        'format': tex.format,
+        'has_alpha': tex.has_alpha,
+        'levels': [(w, h, data.nbytes) for w, h, data in tex.levels],
+    }).encode('utf-8')
+    head = TEXCACHE_MAGIC + struct.pack('<I', len(header)) + header
+    head += b'\x00' * (-len(head) % 16)
+
+    cache_path = tex.path + TEXCACHE_EXT
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(head)
+        for _, _, data in tex.levels:
+            f.write(np.ascontiguousarray(data).tobytes())
+    os.replace(tmp, cache_path)
+
+def read_texture_cache(path, key):
+    """Memory-map a cached mip chain, or return None if it is missing or stale"""
+    cache_path = path + TEXCACHE_EXT
+    if not os.path.exists(cache_path): return None
+    mm = np.memmap(cache_path, dtype=np.uint8, mode='r')
+    if bytes(mm[:len(TEXCACHE_MAGIC)]) != TEXCACHE_MAGIC: return None
+    (size,) = struct.unpack('<I', bytes(mm[len(TEXCACHE_MAGIC):len(TEXCACHE_MAGIC) + 4]))
+    offset = len(TEXCACHE_MAGIC) + 4
+    header = json.loads(bytes(mm[offset:offset + size]).decode('utf-8'))
+    if header['source'] != key: return None
+
+    offset += size
+    offset += -offset % 16
+    levels = []
+    for w, h, n in header['levels']:
+        levels.append((w, h, mm[offset:offset + n]))
+        offset += n
+    if offset > len(mm): return None
+    return TextureData(path, key, levels, header['format'], header['has_alpha'], cached=True)
+
+def load_texture_data(filename, quality=TEXTURE_QUALITY, use_cache=True):
+    """Cached mip chain, or decode the image and build one. No GL calls - safe on a worker thread."""
+    path = os.path.join(TEX_DIR, filename)
+    key = source_key(path, quality=quality)
+    if use_cache:
+        try:
+            tex = read_texture_cache(path, key)
+            if tex is not None: return tex
+        except (OSError, ValueError, KeyError, struct.error) as e: # struct.error: truncated header
+            print(f"Texture cache unreadable {path}: {e}")
+
+    surf = pygame.image.load(path)
+    w, h = surf.get_size()
+    rgba = np.frombuffer(pygame.image.tostring(surf, "RGBA", False), dtype=np.uint8).reshape(h, w, 4)
+    has_alpha = bool((rgba[..., 3] < 255).any())
+    levels = [(l.shape[1], l.shape[0], np.ascontiguousarray(l)) for l in build_mip_chain(rgba, quality)]
+    return TextureData(path, key, levels, FORMAT_RGBA8, has_alpha)
+
+_s3tc = None
+
+def compressed_format(has_alpha):
+    """S3TC format the driver should compress into, or None. GL thread only."""
+    global _s3tc
+    if not TEXTURE_COMPRESSION or glInitTextureCompressionS3TcEXT is None: return None
+    if _s3tc is None:
+        try:
+            _s3tc = bool(glInitTextureCompressionS3TcEXT())
+        except Exception:
+            _s3tc = False
+    if not _s3tc: return None
+    return int(GL_COMPRESSED_RGBA_S3TC_DXT5_EXT if has_alpha else GL_COMPRESSED_RGB_S3TC_DXT1_EXT)
+
+def _read_back(tex, fmt):
+    """The driver's compressed blocks for every level of the bound texture"""
+    levels = []
+    for i, (w, h, _) in enumerate(tex.levels):
+        size = int(glGetTexLevelParameteriv(GL_TEXTURE_2D, i, GL_TEXTURE_COMPRESSED_IMAGE_SIZE))
+        data = np.zeros(size, dtype=np.uint8)
+        _get_compressed_image(GL_TEXTURE_2D, i, data)
+        levels.append((w, h, data))
+    return TextureData(tex.path, tex.key, levels, fmt, tex.has_alpha, cached=True)
+
+def upload_texture_data(tex, tid=None):
+    """
+    Upload every mip level into a new texture, or re-specify `tid` (hot reload).
+    Fresh decodes are cached on the way. Returns (tid, bytes on the GPU). GL thread only.
+    """
+    if tex.format != FORMAT_RGBA8 and compressed_format(tex.has_alpha) is None:
+        # Cache was compressed on a machine with S3TC; start over from the source
+        tex = load_texture_data(os.path.basename(tex.path), tex.key['quality'], use_cache=False)
+
+    if not tid: tid = glGenTextures(1)
+    bind_texture(tid)
+    glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAX_LEVEL, len(tex.levels) - 1)
+    if tex.format != FORMAT_RGBA8:
+        for i, (w, h, data) in enumerate(tex.levels):
+            glCompressedTexImage2D(GL_TEXTURE_2D, i, tex.format, w, h, 0, data) # PyOpenGL fills in imageSize
+        return tid, tex.nbytes
+
+    fmt = compressed_format(tex.has_alpha)
+    for i, (w, h, data) in enumerate(tex.levels):
+        glTexImage2D(GL_TEXTURE_2D, i, fmt or GL_RGBA, w, h, 0, GL_RGBA, GL_UNSIGNED_BYTE, data)
+    # DXT5 is 4:1 against RGBA8, DXT1 8:1
+    nbytes = tex.nbytes // (4 if tex.has_alpha else 8) if fmt else tex.nbytes
+    if not tex.cached:
+        try:
+            if fmt:
+                tex = _read_back(tex, fmt)
+                nbytes = tex.nbytes
+            write_texture_cache(tex)
+        except Exception as e:
+            print(f"Texture cache not written {tex.path}: {e}")
+    return tid, nbytes
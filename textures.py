@@ -0,0 +1,187 @@
+"""
+Texture manager - named textures loaded on demand, reference counted, evicted LRU over a
+VRAM budget and reloaded in place when their source files change
+"""
+import os
+import time
+from OpenGL.GL import *
+from config import TEX_DIR, TEXTURE_VRAM_BUDGET_MB, TEXTURE_RELOAD_INTERVAL
+from texture_cache import load_texture_data, upload_texture_data
+from glstate import gl_state
+
+def set_texture_params(aniso_level=4.0):
+    """Sampling state for world textures (bound texture)"""
+    glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+    glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+    glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
+    glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
+
+    try:
+         if glInitTextureFilterAnisotropicEXT():
+            max_aniso = glGetFloatv(GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT)
+            amount = min(aniso_level, max_aniso)
+            glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAX_ANISOTROPY_EXT, amount)
+    except: pass
+
+class TextureEntry:
+    def __init__(self, name, load, sources):
+        self.name = name
+        self.load = load        # load(tid or None, prefetched data or None) -> (tid, nbytes), GL thread
+        self.sources = sources  # Files watched for hot reload
+        self.tid = 0
+        self.nbytes = 0
+        self.refs = 0
+        self.last_used = -1
+        self.stamp = None       # Source mtimes at load time
+        self.failed = False
+
+class TextureHandle:
+    """Keeps a texture resident (never evicted) while held. .id loads it on first use."""
+    def __init__(self, manager, name):
+        self.manager = manager
+        self.name = name
+
+    @property
+    def id(self):
+        return self.manager.id(self.name) if self.manager else 0
+
+    def release(self):
+        if self.manager:
+            self.manager.release(self.name)
+            self.manager = None
+
+class TextureManager:
+    """
+    Textures are registered by name and only loaded when first asked for (id / get /
+    acquire). Anything not held by a handle and not used in the current frame may be
+    evicted, least recently used first, once resident textures pass the VRAM budget.
+    Several names can share one texture through aliases (atlas sprites), each with its UV rectangle.
+    """
+    def __init__(self, budget_mb=TEXTURE_VRAM_BUDGET_MB, reload_interval=TEXTURE_RELOAD_INTERVAL):
+        self.entries = {}  # name -> TextureEntry
+        self.aliases = {}  # sprite name -> [entry name, (u0, v0, u1, v1)]
+        self.budget = budget_mb * 1024 * 1024
+        self.reload_interval = reload_interval
+        self.frame = 0
+        self.resident_bytes = 0
+        self.loads = self.evictions = self.reloads = 0
+        self._next_poll = 0.0
+
+    # --- Registration ---
+
+    def register(self, name, filename, aniso_level=4.0):
+        """A texture file in TEX_DIR (mip chain through the texture cache)"""
+        def load(tid=None, data=None):
+            tid, nbytes = upload_texture_data(data or load_texture_data(filename), tid)
+            set_texture_params(aniso_level)
+            return tid, nbytes
+        self.register_loader(name, load, [os.path.join(TEX_DIR, filename)])
+
+    def register_loader(self, name, load, sources=()):
+        if name in self.entries: return
+        self.aliases.pop(name, None)
+        self.entries[name] = TextureEntry(name, load, list(sources))
+
+    def alias(self, name, entry_name, uv=(0, 0, 1, 1)):
+        self.aliases[name] = [entry_name, uv]
+
+    def __contains__(self, name):
+        return name in self.entries or name in self.aliases
+
+    # --- Lookup ---
+
+    def _entry(self, name):
+        alias = self.aliases.get(name)
+        return self.entries.get(alias[0] if alias else name)
+
+    def id(self, name):
+        """GL texture id, loading it if needed. 0 for unknown or broken textures."""
+        e = self._entry(name)
+        if e is None: return 0
+        e.last_used = self.frame
+        if not e.tid and not e.failed: self._load(e)
+        return e.tid
+
+    def get(self, name, default=0):
+        return self.id(name) or default
+
+    def uv(self, name):
+        alias = self.aliases.get(name)
+        if alias is None: return (0, 0, 1, 1)
+        self.id(name) # Atlas loaders fill the rectangles in
+        return alias[1]
+
+    def acquire(self, name):
+        e = self._entry(name)
+        if e is not None: e.refs += 1
+        return TextureHandle(self, name)
+
+    def release(self, name):
+        e = self._entry(name)
+        if e is not None: e.refs = max(0, e.refs - 1)
+
+    # --- Residency ---
+
+    def install(self, name, data):
+        """Upload data decoded ahead of time (asset loader)"""
+        e = self.entries.get(name)
+        if e is not None: self._load(e, data)
+
+    def _load(self, e, data=None):
+        try:
+            tid, nbytes = e.load(e.tid or None, data)
+        except Exception as ex:
+            print(f"Error loading texture {e.name}: {ex}")
+            if not e.tid: e.failed = True
+            return
+        self.resident_bytes += nbytes - e.nbytes
+        e.tid, e.nbytes = tid, nbytes
+        e.stamp = self._stamp(e)
+        e.last_used = self.frame
+        self.loads += 1
+        self._enforce_budget()
+
+    def _evict(self, e):
+        glDeleteTextures([e.tid])
+        gl_state.forget_texture(e.tid)
+        self.resident_bytes -= e.nbytes
+        e.tid = e.nbytes = 0
+        self.evictions += 1
+
+    def _enforce_budget(self):
+        if self.resident_bytes <= self.budget: return
+        idle = [e for e in self.entries.values() if e.tid and not e.refs and e.last_used < self.frame]
+        for e in sorted(idle, key=lambda e: e.last_used):
+            if self.resident_bytes <= self.budget: break
+            self._evict(e)
+
+    # --- Per frame ---
+
+    def begin_frame(self):
+        self.frame += 1
+        now = time.monotonic()
+        if self.reload_interval and now >= self._next_poll:
+            self._next_poll = now + self.reload_interval
+            self.poll_changes()
+
+    @staticmethod
+    def _stamp(e):
+        return tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None for p in e.sources)
+
+    def poll_changes(self):
+        """Reload resident textures whose files changed, into the same GL id"""
+        for e in list(self.entries.values()):
+            if e.tid and self._stamp(e) != e.stamp:
+                print(f"Reloading texture {e.name}")
+                self._load(e)
+                self.reloads += 1
+
+    def clear(self):
+        for e in self.entries.values():
+            if e.tid:
+                glDeleteTextures([e.tid])
+                gl_state.forget_texture(e.tid)
+            e.tid = e.nbytes = 0
+        self.resident_bytes = 0
+
+textures = TextureManager()
@@ -0,0 +1,82 @@
+"""
+Fixed-timestep simulation - an accumulator hands out whole ticks, rendering interpolates between the last two
+"""
+from config import SIM_TICK_RATE, SIM_MAX_TICKS_PER_FRAME
+
+class FixedTimestep:
+    """
+    ticks = step.advance(frame_seconds) - run that many simulation ticks of step.dt each,
+    then draw with step.alpha (0..1, how far real time is into the next tick).
+    df is one tick in the old per-frame units (1.0 = a 60 Hz frame), so update(df) code is unchanged.
+    """
+    def __init__(self, rate=SIM_TICK_RATE, max_ticks=SIM_MAX_TICKS_PER_FRAME):
+        self.dt = 1.0 / rate
+        self.df = 60.0 / rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0
+        self.dropped = 0.0 # Seconds skipped because a frame needed more than max_ticks
+
+    def advance(self, frame_seconds):
+        self.accumulator += frame_seconds
+        ticks = int(self.accumulator / self.dt)
+        if ticks > self.max_ticks:
+            # Too slow to catch up: let the game slow down rather than spiral
+            self.dropped += (ticks - self.max_ticks) * self.dt
+            ticks = self.max_ticks
+            self.accumulator = self.dt * 0.999
+        else:
+            self.accumulator -= ticks * self.dt
+        return ticks
+
+    def hold(self):
+        """Simulation paused - don't bank the time"""
+        self.accumulator = 0.0
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+def _copy(value):
+    return value.copy() if hasattr(value, 'copy') else value
+
+class Interpolator:
+    """
+    snapshot(ents) before a tick stores the state it starts from; apply(alpha) then
+    moves those entities part way from it to their current state for drawing and
+    puts the simulated values back afterwards.
+    """
+    def __init__(self, attrs=('x', 'y', 'z', 'rot')):
+        self.attrs = attrs
+        self.prev = []  # (entity, (values...))
+        self._saved = None
+        self._alpha = 0.0
+
+    def snapshot(self, ents):
+        # Entities can be objects with float attributes or stores of arrays (updated in place, so copied)
+        attrs = self.attrs
+        self.prev = [(e, tuple(_copy(getattr(e, a)) for a in attrs)) for e in ents]
+
+    def apply(self, alpha):
+        self._alpha = alpha
+        return self
+
+    def __enter__(self):
+        attrs, alpha = self.attrs, self._alpha
+        self._saved = []
+        for e, old in self.prev:
+            cur = tuple(getattr(e, a) for a in attrs)
+            self._saved.append((e, cur))
+            for a, p, c in zip(attrs, old, cur):
+                setattr(e, a, p + (c - p) * alpha)
+        return self
+
+    def __exit__(self, *exc):
+        attrs = self.attrs
+        for e, cur in self._saved:
+            for a, c in zip(attrs, cur):
+                setattr(e, a, c)
+        self._saved = None
+        return False
+
+    def clear(self):
+        self.prev = []
@@ -0,0 +1,93 @@
+"""
+UI sprite batch - colored and textured quads queued per layer, drawn in a handful of calls
+"""
+import ctypes
+import numpy as np
+from OpenGL.GL import *
+from text import flush_text
+from profiler import profiler
+from glstate import enable, disable, bind_texture
+
+# Interleaved sprite vertex: position(2) texcoord(2) color(4), all float32
+SPRITE_FLOATS = 8
+SPRITE_STRIDE = SPRITE_FLOATS * 4
+_OFS_TEXCOORD = ctypes.c_void_p(2 * 4)
+_OFS_COLOR = ctypes.c_void_p(4 * 4)
+
+class SpriteBatch:
+    """
+    Quads are drawn in (z, texture) order; equal keys keep submission order.
+    Give overlapping quads increasing z (frame < highlight < icon) so sorting by
+    texture can't reorder them. Texture 0 means an untextured, colored quad.
+    """
+    def __init__(self):
+        self.vbo = None
+        self._quads = [] # (z, texture, x, y, w, h, u0, v0, u1, v1, r, g, b, a)
+        self.draw_calls = 0
+
+    def add(self, x, y, w, h, color, texture=0, z=0, uv=(0, 0, 1, 1)):
+        a = color[3] if len(color) > 3 else 1.0
+        self._quads.append((z, texture, x, y, w, h, uv[0], uv[1], uv[2], uv[3], color[0], color[1], color[2], a))
+
+    def flush(self):
+        if not self._quads: return
+        q = np.array(self._quads, dtype=np.float64)
+        self._quads = []
+        q = q[np.lexsort((q[:, 1], q[:, 0]))] # Stable: by z, then texture
+
+        x0, y0 = q[:, 2], q[:, 3]
+        x1, y1 = x0 + q[:, 4], y0 + q[:, 5]
+        u0, v0, u1, v1 = q[:, 6], q[:, 7], q[:, 8], q[:, 9]
+        verts = np.empty((len(q), 4, SPRITE_FLOATS), dtype=np.float32)
+        verts[:, 0, 0:4] = np.stack([x0, y0, u0, v0], axis=1)
+        verts[:, 1, 0:4] = np.stack([x1, y0, u1, v0], axis=1)
+        verts[:, 2, 0:4] = np.stack([x1, y1, u1, v1], axis=1)
+        verts[:, 3, 0:4] = np.stack([x0, y1, u0, v1], axis=1)
+        verts[:, :, 4:8] = q[:, None, 10:14]
+        verts = verts.reshape(-1, SPRITE_FLOATS)
+
+        if self.vbo is None: self.vbo = int(glGenBuffers(1))
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, verts.nbytes, verts, GL_STREAM_DRAW)
+
+        disable(GL_LIGHTING)
+        enable(GL_BLEND); glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_TEXTURE_COORD_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(2, GL_FLOAT, SPRITE_STRIDE, None)
+        glTexCoordPointer(2, GL_FLOAT, SPRITE_STRIDE, _OFS_TEXCOORD)
+        glColorPointer(4, GL_FLOAT, SPRITE_STRIDE, _OFS_COLOR)
+
+        # One draw per run of quads sharing a texture
+        tex = q[:, 1].astype(np.int64)
+        starts = np.flatnonzero(np.r_[True, tex[1:] != tex[:-1]])
+        ends = np.r_[starts[1:], len(tex)]
+        for start, end in zip(starts, ends):
+            tid = int(tex[start])
+            if tid:
+                enable(GL_TEXTURE_2D)
+                bind_texture(tid)
+                profiler.count('texture_binds')
+            else:
+                disable(GL_TEXTURE_2D)
+            glDrawArrays(GL_QUADS, int(start) * 4, int(end - start) * 4)
+            self.draw_calls += 1
+            profiler.count('draw_calls')
+
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_TEXTURE_COORD_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        disable(GL_TEXTURE_2D)
+        glColor4f(1, 1, 1, 1)
+
+    def clear(self):
+        self._quads = []
+
+sprite_batch = SpriteBatch()
+
+def flush_ui():
+    """End of a UI layer: quads first, then the text drawn on top of them"""
+    sprite_batch.flush()
+    flush_text()
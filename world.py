@@ -1,14 +1,8 @@
-import math
 from OpenGL.GL import *
-
-def get_height(x, z):
-    # Procedural terrain
-    val = math.sin(x * 0.1) * 1.5 + math.cos(z * 0.1) * 1.5
-    val += math.sin(x*0.3 + z*0.2) * 0.5
-    dist = math.sqrt(x*x + z*z)
-    # Flatten near spawn (0,0)
-    if dist < 8: val *= (dist/8.0)
-    return val
+from terrain import get_height
+from chunks import ChunkManager
+from profiler import profiled, profiler
+from glstate import enable, disable, bind_texture
     
 def shadow_projection(light_pos, ground_y=0.1):
     lx, ly, lz, lw = light_pos
@@ -25,57 +19,27 @@ def shadow_projection(light_pos, ground_y=0.1):
     glTranslatef(0, ground_y+0.05, 0) # Raise slightly to avoid z-fight
     glMultMatrixf(mat)
     
-ground_list = None
+ground_chunks = ChunkManager()
 
-def draw_ground(texture_ids):
-    global ground_list
-    
+def update_ground(x, z):
+    # Stream terrain chunks around (x, z) - call once per frame on the GL thread
+    ground_chunks.update(x, z)
+
+@profiled('draw_ground')
+def draw_ground(textures, frustum=None):
     # Enforce opaque rendering
-    glDisable(GL_BLEND)
-    glEnable(GL_DEPTH_TEST)
-    glEnable(GL_TEXTURE_2D)
-    glEnable(GL_LIGHTING)
+    disable(GL_BLEND)
+    enable(GL_DEPTH_TEST)
+    enable(GL_TEXTURE_2D)
+    enable(GL_LIGHTING)
     
-    glBindTexture(GL_TEXTURE_2D, texture_ids.get('grass', 0))
+    bind_texture(textures.id('grass'))
+    profiler.count('texture_binds')
     glColor3f(1, 1, 1) # Pure white for texture
     
     # Configure texture wrapping repeat
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_REPEAT)
     glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_REPEAT)
     
-    # Generate display list if not exists
-    if ground_list is None:
-        ground_list = glGenLists(1)
-        glNewList(ground_list, GL_COMPILE)
-        
-        step = 2.0
-        size = 60
-        
-        glBegin(GL_QUADS)
-        glNormal3f(0, 1, 0)
-        
-        for x in range(-size, size, int(step)):
-            for z in range(-size, size, int(step)):
-                # Calculate vertices
-                x1, z1 = x, z
-                x2, z2 = x + step, z + step
-                
-                h_11 = get_height(x1, z1)
-                h_12 = get_height(x1, z2)
-                h_22 = get_height(x2, z2)
-                h_21 = get_height(x2, z1)
-                
-                # Tex Coords (scaling allows repeat)
-                s = 5.0 
-                
-                glTexCoord2f(x1/s, z1/s); glVertex3f(x1, h_11, z1)
-                glTexCoord2f(x1/s, z2/s); glVertex3f(x1, h_12, z2)
-                glTexCoord2f(x2/s, z2/s); glVertex3f(x2, h_22, z2)
-                glTexCoord2f(x2/s, z1/s); glVertex3f(x2, h_21, z1)
-                
-        glEnd()
-        glEndList()
-        
-    # Draw the list
-    glCallList(ground_list)
-    glDisable(GL_TEXTURE_2D)
+    ground_chunks.draw(frustum)
+    disable(GL_TEXTURE_2D)
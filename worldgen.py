@@ -0,0 +1,81 @@
+"""
+World generation - entity placement only (no GL), so tools and benchmarks can build worlds without a window
+"""
+import math
+import random
+import numpy as np
+from terrain import get_heights
+from entities import Chest, Wolf, Spider, Mushroom, Rock
+from mobs import clear_mobs
+
+TREE_SCALE = 2.5
+
+class World:
+    """
+    Per-kind registries filled by generate_world. Trees are array rows (x, y, z, scale, yaw),
+    everything else is a __slots__ object in the list for its type.
+    """
+    __slots__ = ('trees', 'chests', 'wolves', 'spiders', 'mushrooms', 'rocks')
+
+    def __init__(self):
+        self.trees = np.zeros((0, 5), dtype=np.float32)
+        self.chests = []
+        self.wolves = []
+        self.spiders = []
+        self.mushrooms = []
+        self.rocks = []
+
+    @property
+    def props(self):
+        """Static props for the batcher"""
+        return self.mushrooms + self.rocks
+
+    def __len__(self):
+        return (len(self.trees) + len(self.chests) + len(self.wolves) + len(self.spiders)
+                + len(self.mushrooms) + len(self.rocks))
+
+def generate_world(scale=1, seed=None):
+    """
+    Trees, chests, mobs and props around spawn. scale multiplies every count.
+    seed reseeds the shared random module, which the entity constructors draw from too.
+    """
+    if seed is not None: random.seed(seed)
+    clear_mobs() # Wolves and spiders live in the mob stores; a new world starts them empty
+    n = lambda count: int(round(count * scale))
+    world = World()
+    # Trees
+    spots = []
+    for i in range(n(50)):
+        x = random.uniform(-50, 50)
+        z = random.uniform(-50, 50)
+        if math.sqrt(x*x + z*z) < 5: continue
+        spots.append((x, z))
+    world.trees = np.zeros((len(spots), 5), dtype=np.float32)
+    if spots:
+        xs, zs = np.array(spots).T
+        world.trees[:, 0], world.trees[:, 1], world.trees[:, 2] = xs, get_heights(xs, zs), zs
+        world.trees[:, 3] = TREE_SCALE
+
+    # Chests
+    # Guaranteed chest right in front of spawn
+    world.chests.append(Chest(0, -3))  # Directly in front of player
+
+    for i in range(n(4)):
+        cx, cz = random.uniform(-40, 40), random.uniform(-40, 40)
+        world.chests.append(Chest(cx, cz))
+
+    # Mobs
+    for i in range(n(3)):
+        world.wolves.append(Wolf(random.uniform(-30,30), random.uniform(-30,30)))
+    for i in range(n(3)):
+        world.spiders.append(Spider(random.uniform(-30,30), random.uniform(-30,30)))
+
+    # Props (Mushrooms and Rocks)
+    for i in range(n(40)):
+        mx, mz = random.uniform(-50, 50), random.uniform(-50, 50)
+        world.mushrooms.append(Mushroom(mx, mz))
+
+    for i in range(n(15)):
+        rx, rz = random.uniform(-50, 50), random.uniform(-50, 50)
+        world.rocks.append(Rock(rx, rz))
+    return world